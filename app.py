@@ -105,43 +105,7 @@ def mcu_update_window_keyRegs():
 
 
 def mcu_update_window_flags():
-    window.flags = {
-        'ea': m.mem.ea,
-        'es': m.mem.es,
-        'et1': m.mem.et1,
-        'ex1': m.mem.ex1,
-        'et0': m.mem.et0,
-        'ex0': m.mem.ex0,
-        'ps': m.mem.ps,
-        'pt1': m.mem.pt1,
-        'px1': m.mem.px1,
-        'pt0': m.mem.pt0,
-        'px0': m.mem.px0,
-        'c': m.mem.c,
-        'ac': m.mem.ac,
-        'f0': m.mem.f0,
-        'rs1': m.mem.rs1,
-        'rs0': m.mem.rs0,
-        'ov': m.mem.ov,
-        'f1': m.mem.f1,
-        'p': m.mem.p,
-        'tf1': m.mem.tf1,
-        'tr1': m.mem.tr1,
-        'tf0': m.mem.tf0,
-        'tr0': m.mem.tr0,
-        'ie1': m.mem.ie1,
-        'it1': m.mem.it1,
-        'ie0': m.mem.ie0,
-        'it0': m.mem.it0,
-        't1_gate': m.mem.t1_gate,
-        't1_ct': m.mem.t1_ct,
-        't1_m1': m.mem.t1_m1,
-        't1_m0': m.mem.t1_m0,
-        't0_gate': m.mem.t0_gate,
-        't0_ct': m.mem.t0_ct,
-        't0_m1': m.mem.t0_m1,
-        't0_m0': m.mem.t0_m0,
-    }
+    window.flags = m.mem.flags('ie', 'ip', 'psw', 'tcon', 'tmod')
 
 
 def mcu_update_window_ports():
@@ -1,3 +1,5 @@
+import hashlib
+
 import mcu
 
 
@@ -10,39 +12,237 @@ def disassemble(file_content):
             addr = record.first_byte_addr
         for byte in record:
             if getting_opcode:
-                op = mcu.Operation(byte)
-                if len(op) == 1:
-                    yield addr, len(op), op.opcode, op.args, str(op)
-                    addr += len(op)
+                opcode = byte
+                length = mcu.OPCODES[opcode].length
+                if length == 1:
+                    yield addr, length, opcode, (), mcu.Operation.mnemonic(opcode, ())
+                    addr += length
                     continue
                 getting_opcode = False
                 args = []
             else:
-                if len(args) < len(op) - 1:
+                if len(args) < length - 1:
                     args.append(byte)
-                    if len(args) == len(op) - 1:
-                        op.args = args
-                        yield addr, len(op), op.opcode, op.args, str(op)
+                    if len(args) == length - 1:
+                        yield addr, length, opcode, args, mcu.Operation.mnemonic(opcode, args)
                         getting_opcode = True
-                        addr += len(op)
+                        addr += length
+
+
+def disassemble_rom(rom, start=0, end=None):
+    # Linear sweep over a ROM image, e.g. Microcontroller.rom, lazily yielding the instructions
+    # that start in [start, end) as (addr, length, opcode, args, mnemonic)
+    end = len(rom) if end is None else min(end, len(rom))
+    addr = start
+    while addr < end:
+        opcode = rom[addr]
+        # An undefined opcode (A5h) is treated as a single byte without a mnemonic
+        info = mcu.OPCODES[opcode]
+        length = info.length or 1
+        args = tuple(rom[addr + 1:addr + length])
+        if len(args) < length - 1:
+            # Cut off by the end of ROM
+            return
+        mnemonic = mcu.Operation.mnemonic(opcode, args) if info.mnemonic else None
+        yield addr, length, opcode, args, mnemonic
+        addr += length
+
+
+def control_flow_graph(rom):
+    # Control flow graph of a ROM image (e.g. Microcontroller.rom), cached per image contents
+    digest = rom.digest if hasattr(rom, 'digest') else hashlib.sha1(bytes(rom)).digest()
+    graph = ControlFlowGraph._cache.get(digest)
+    if graph is None:
+        if len(ControlFlowGraph._cache) >= ControlFlowGraph.CACHE_SIZE:
+            ControlFlowGraph._cache.pop(next(iter(ControlFlowGraph._cache)))
+        graph = ControlFlowGraph._cache[digest] = ControlFlowGraph(bytes(rom))
+    return graph
+
+
+class ControlFlowGraph:
+    # Recursive traversal from the reset and interrupt vectors
+    ENTRY_POINTS = {0: 'RESET', 3: 'INT0', 11: 'TIMER0', 19: 'INT1', 27: 'TIMER1'}
+    CACHE_SIZE = 16
+    # JBC, JB, JNB, JC, JNC, JZ, JNZ, SJMP, CJNE, DJNZ
+    _relative_jumps = frozenset((16, 32, 48, 64, 80, 96, 112, 128, *range(180, 192), 213, *range(216, 224)))
+    # SHA-1 of a ROM image -> graph
+    _cache = {}
+
+    def __init__(self, rom):
+        self.blocks = {}
+        self.labels = dict(self.ENTRY_POINTS)
+        calls = set()
+        # Address of every reachable instruction -> (instruction, successors, whether it ends a block)
+        decoded = {}
+        leaders = set(self.ENTRY_POINTS)
+        to_visit = list(self.ENTRY_POINTS)
+        while to_visit:
+            addr = to_visit.pop()
+            while addr not in decoded:
+                instruction = next(disassemble_rom(rom, addr, addr + 1), None)
+                if instruction is None:
+                    break
+                successors, ends_block, call = self._successors(rom, instruction)
+                decoded[addr] = instruction, successors, ends_block
+                if call is not None:
+                    calls.add(call)
+                    leaders.add(call)
+                    to_visit.append(call)
+                if ends_block:
+                    leaders.update(successors)
+                    to_visit.extend(successors)
+                    break
+                addr = successors[0]
+
+        for addr in sorted(calls - set(self.ENTRY_POINTS)):
+            self.labels[addr] = f'SUB_{addr:04X}'
+        for start in sorted(leaders):
+            if start not in decoded:
+                continue
+            instructions = []
+            addr = start
+            while True:
+                instruction, successors, ends_block = decoded[addr]
+                instructions.append(instruction)
+                if ends_block:
+                    break
+                addr = successors[0]
+                if addr in leaders or addr not in decoded:
+                    break
+            self.blocks[start] = BasicBlock(start, instructions, successors)
+            self.labels.setdefault(start, f'L_{start:04X}')
+
+    @staticmethod
+    def _successors(rom, instruction):
+        # Addresses execution can continue at, whether the instruction ends a block, and the called address
+        addr, length, opcode, args, _ = instruction
+        following = (addr + length) % 65536
+        if opcode in (2, 18):
+            # LJMP, LCALL
+            target = args[0] << 8 | args[1]
+        elif opcode & 0b1111 == 1:
+            # AJMP, ACALL
+            target = following & 0b1111100000000000 | opcode >> 5 << 8 | args[0]
+        elif opcode in ControlFlowGraph._relative_jumps:
+            # Convert from two's complement representation
+            target = (following + (args[-1] - 256 if args[-1] > 127 else args[-1])) % 65536
+        elif opcode == 115:
+            # JMP @A+DPTR
+            return ControlFlowGraph._jump_table(rom, addr), True, None
+        elif opcode in (34, 50, 165):
+            # RET, RETI and the undefined opcode
+            return (), True, None
+        else:
+            return (following,), False, None
+
+        if opcode == 18 or opcode & 0b11111 == 0b10001:
+            return (following,), False, target
+        if opcode in (1, 2, 128) or opcode & 0b11111 == 1:
+            # Unconditional jumps
+            return (target,), True, None
+        return (target, following), True, None
+
+    @staticmethod
+    def _jump_table(rom, addr):
+        # Follow a jump table (AJMP, SJMP or LJMP entries) set up by MOV DPTR, #table right before
+        if addr < 3 or rom[addr - 3] != 144:
+            return ()
+        entry = rom[addr - 2] << 8 | rom[addr - 1]
+        targets = []
+        for instruction in disassemble_rom(rom, entry):
+            entry_opcode = instruction[2]
+            if not (entry_opcode in (2, 128) or entry_opcode & 0b11111 == 1) or len(targets) == 128:
+                break
+            targets.append(instruction[0])
+        return tuple(targets)
+
+
+class BasicBlock:
+    def __init__(self, start: int, instructions, successors):
+        self.start = start
+        # (addr, length, opcode, args, mnemonic) as yielded by disassemble_rom
+        self.instructions = instructions
+        self.successors = successors
+
+    @property
+    def end(self):
+        addr, length = self.instructions[-1][:2]
+        return addr + length
 
 
 class IntelHexFile:
-    def __init__(self, file_content):
-        # [:-1] to skip the trailing EOF Record
-        self._records = [Record(line) for line in file_content.splitlines()[:-1]]
+    def __init__(self, source):
+        # The source is the file's content (str or bytes), a file object or an os.PathLike path;
+        # only data records are kept, with addresses extended by the 02/04 records
+        self._records = []
+        self.start_addr = None
+        base_addr = 0
+        for line in self._lines(source):
+            line = line.strip()
+            if not line:
+                continue
+            record = Record(line)
+            if record.type == Record.DATA:
+                record.first_byte_addr += base_addr
+                self._records.append(record)
+            elif record.type == Record.EOF:
+                break
+            elif record.type == Record.EXTENDED_SEGMENT_ADDRESS:
+                base_addr = int.from_bytes(record.data, 'big') * 16
+            elif record.type == Record.EXTENDED_LINEAR_ADDRESS:
+                base_addr = int.from_bytes(record.data, 'big') << 16
+            elif record.type == Record.START_SEGMENT_ADDRESS:
+                # CS:IP
+                cs, ip = record.data[:2], record.data[2:]
+                self.start_addr = int.from_bytes(cs, 'big') * 16 + int.from_bytes(ip, 'big')
+            elif record.type == Record.START_LINEAR_ADDRESS:
+                self.start_addr = int.from_bytes(record.data, 'big')
+            else:
+                raise ValueError(f'Unknown record type: {record.type}')
+
+    @staticmethod
+    def _lines(source):
+        if hasattr(source, 'read'):
+            # Read a file object line by line
+            for line in source:
+                yield line.decode('ascii') if isinstance(line, bytes) else line
+            return
+        if isinstance(source, (bytes, bytearray)):
+            source = source.decode('ascii')
+        elif hasattr(source, '__fspath__'):
+            # An os.PathLike object; strings are always the file's content
+            with open(source) as f:
+                source = f.read()
+        yield from source.splitlines()
 
     def __iter__(self):
         for record in self._records:
             yield record
 
+    def __len__(self):
+        return len(self._records)
+
 
 class Record:
+    DATA = 0
+    EOF = 1
+    EXTENDED_SEGMENT_ADDRESS = 2
+    START_SEGMENT_ADDRESS = 3
+    EXTENDED_LINEAR_ADDRESS = 4
+    START_LINEAR_ADDRESS = 5
+
     def __init__(self, line):
-        self.first_byte_addr = int(line[3:7], 16)
-        self._data = line[9:-2]
+        if not line.startswith(':'):
+            raise ValueError(f'Not an Intel HEX record: {line!r}')
+        # Byte count, address (2 bytes), record type, data and checksum
+        raw = bytes.fromhex(line[1:])
+        if len(raw) < 5 or len(raw) != raw[0] + 5:
+            raise ValueError(f'Wrong record length: {line!r}')
+        if sum(raw) % 256:
+            raise ValueError(f'Wrong checksum: {line!r}')
+        self.type = raw[3]
+        self.first_byte_addr = raw[1] << 8 | raw[2]
+        self.data = raw[4:-1]
 
     def __iter__(self):
-        # Every two consecutive hexadecimal digits (ASCII) represent a byte of data
-        for idx in range(0, len(self._data), 2):
-            yield int(self._data[idx:idx + 2], 16)
+        return iter(self.data)
@@ -1,11 +1,131 @@
+import hashlib
+import time
+import zlib
+from collections import deque
 from typing import Tuple, Union
 
 import disassembler
 
 
+def _build_da_tables():
+    # Results and C flags of DA A, indexed by C << 9 | AC << 8 | A
+    results = bytearray(1024)
+    carries = bytearray(1024)
+    for c in range(2):
+        for ac in range(2):
+            for a in range(256):
+                result = a
+                carry = c
+                if ac or result & 15 > 9:
+                    carry = carry or result + 6 > 255
+                    result = (result + 6) % 256
+                if carry or result >> 4 > 9:
+                    carry = carry or result + 96 > 255
+                    result = (result + 96) % 256
+                i = c << 9 | ac << 8 | a
+                results[i] = result
+                carries[i] = carry
+    return results, carries
+
+
+def _jumps_to_itself(opcode: int, args, addr: int):
+    # Whether the jump at addr would jump to itself when taken
+    length = OPCODES[opcode].length
+    if opcode == 2:
+        return args[0] << 8 | args[1] == addr
+    if opcode % 32 == 1:
+        # AJMP stays within the 2 KiB page of the next instruction
+        return (addr + length) % 65536 // 2048 * 2048 + opcode // 32 * 256 + args[0] == addr
+    return OPCODES[opcode].operand_kinds[-1:] == ('offset',) and args[-1] == 256 - length
+
+
+# Named SFRs, accessible as properties of InternalDataMemory
+SFR_ADDRESSES = {
+    'p0': 128,
+    'sp': 129,
+    'tcon': 136,
+    'tmod': 137,
+    'tl0': 138,
+    'tl1': 139,
+    'th0': 140,
+    'th1': 141,
+    'p1': 144,
+    'p2': 160,
+    'ie': 168,
+    'p3': 176,
+    'ip': 184,
+    'psw': 208,
+    'a': 224,
+    'b': 240,
+}
+
+# Named SFR bits, accessible as properties of InternalDataMemory
+# Bit numbers are big-endian, as in Byte
+SFR_BITS = {
+    'tf1': ('tcon', 0),
+    'tr1': ('tcon', 1),
+    'tf0': ('tcon', 2),
+    'tr0': ('tcon', 3),
+    'ie1': ('tcon', 4),
+    'it1': ('tcon', 5),
+    'ie0': ('tcon', 6),
+    'it0': ('tcon', 7),
+    't1_gate': ('tmod', 0),
+    't1_ct': ('tmod', 1),
+    't1_m1': ('tmod', 2),
+    't1_m0': ('tmod', 3),
+    't0_gate': ('tmod', 4),
+    't0_ct': ('tmod', 5),
+    't0_m1': ('tmod', 6),
+    't0_m0': ('tmod', 7),
+    'ea': ('ie', 0),
+    'es': ('ie', 3),
+    'et1': ('ie', 4),
+    'ex1': ('ie', 5),
+    'et0': ('ie', 6),
+    'ex0': ('ie', 7),
+    't1': ('p3', 2),
+    't0': ('p3', 3),
+    'int1': ('p3', 4),
+    'int0': ('p3', 5),
+    'ps': ('ip', 3),
+    'pt1': ('ip', 4),
+    'px1': ('ip', 5),
+    'pt0': ('ip', 6),
+    'px0': ('ip', 7),
+    'c': ('psw', 0),
+    'ac': ('psw', 1),
+    'f0': ('psw', 2),
+    'rs1': ('psw', 3),
+    'rs0': ('psw', 4),
+    'ov': ('psw', 5),
+    'f1': ('psw', 6),
+    'p': ('psw', 7),
+}
+
+# Bit address -> (byte address, mask); bits 0-127 are in bytes 32-47, the rest in bit-addressable SFRs
+BIT_ADDRESSES = [(bit // 8 + 32 if bit < 128 else bit // 8 * 8, 1 << bit % 8) for bit in range(256)]
+
+# A -> value of the P flag, which is set when A holds an even number of ones
+PARITY_FLAGS = bytes(0 if bin(a).count('1') % 2 else 1 for a in range(256))
+
+DA_RESULTS, DA_CARRIES = _build_da_tables()
+
+
 class Microcontroller:
-    def __init__(self):
-        self.rom = [0] * 65536  # 64 KiB
+    # First byte of the blobs made by snapshot()
+    _snapshot_version = 2
+    # Oscillator periods per machine cycle
+    CLOCKS_PER_CYCLE = 12
+
+    def __init__(self, oscillator_hz=12000000):
+        self.oscillator_hz = oscillator_hz
+        # Machine cycles executed since reset, stored in 64 bits by snapshot()
+        self.cycles = 0
+        # (deadline in cycles, cycles, deadline in device seconds) at the end of the last
+        # run_for_cycles or run_for_seconds that reached its deadline
+        self._last_deadline = None
+        self.rom = Rom(self)
         self.mem = InternalDataMemory()
         self.xmem = ExternalDataMemory()
         self._pc = DoubleByte()
@@ -13,6 +133,15 @@ class Microcontroller:
         self.interrupt_stack.push(0)
         self.timer0 = Timer0(self)
         self.timer1 = Timer1(self)
+        # Look-up table indexed by opcode, built once instead of resolving a handler every cycle
+        self._handlers = [getattr(self, f'_exec_{opcode}') for opcode in range(256)]
+        # Opcode -> handler set by register_handler
+        self._replaced_handlers = {}
+        # ROM address -> (handler, args, length, cycles) of the instruction stored there
+        self._decoded = {}
+        self.translator = BlockTranslator(self)
+        # Undo journal kept by next_cycle, see enable_time_travel
+        self.time_travel = None
 
     @property
     def pc(self):
@@ -22,25 +151,163 @@ class Microcontroller:
     def pc(self, value):
         self._pc.value = value
 
-    def load_hex_file(self, file_content):
-        for record in disassembler.IntelHexFile(file_content):
-            for addr, byte in enumerate(record, record.first_byte_addr):
-                self.rom[addr] = byte
+    @property
+    def seconds(self):
+        # Time elapsed on the device since reset
+        return self.cycles * self.CLOCKS_PER_CYCLE / self.oscillator_hz
+
+    def load_hex_file(self, source):
+        # The source is the file's content (str or bytes), a file object or an os.PathLike path
+        start = time.perf_counter()
+        hex_file = disassembler.IntelHexFile(source)
+        byte_count = self.rom.load((record.first_byte_addr, record.data) for record in hex_file)
+        return LoadReport(len(hex_file), byte_count, time.perf_counter() - start)
+
+    def load_binary(self, image: Union[bytes, bytearray]):
+        # Replace the ROM with a raw image starting at address 0
+        self.rom = Rom(self, image)
+        self._decoded.clear()
+        self.translator.invalidate()
 
     def reset_rom(self):
         self.reset_ram()
-        self.rom = [0] * 65536
+        self.rom = Rom(self)
+        self._decoded.clear()
+        self.translator.invalidate()
+
+    def snapshot(self, compress_xram=False):
+        # PC, cycle counter, internal RAM and SFRs (including the timers), pin latches,
+        # interrupt stack and XRAM
+        mem = self.mem
+        stack = bytes(self.interrupt_stack)
+        xram = self.xmem.snapshot()
+        if compress_xram:
+            xram = zlib.compress(xram)
+        return b''.join((bytes([self._snapshot_version, compress_xram, mem.latches, len(stack)]),
+                         int(self.pc).to_bytes(2, 'big'), (self.cycles % 2 ** 64).to_bytes(8, 'big'),
+                         bytes(mem), stack, xram))
+
+    def restore(self, snapshot: bytes):
+        if len(snapshot) < 270 or snapshot[0] != self._snapshot_version:
+            raise ValueError('Not a snapshot of this version')
+        compress_xram, latches, stack_size = snapshot[1:4]
+        xram = snapshot[270 + stack_size:]
+        if compress_xram:
+            try:
+                xram = zlib.decompress(xram)
+            except zlib.error as e:
+                raise ValueError('Corrupted XRAM in the snapshot') from e
+        # First, as it checks the rest of the blob before anything is changed
+        self.xmem.restore(xram)
+        self.pc = int.from_bytes(snapshot[4:6], 'big')
+        self.cycles = int.from_bytes(snapshot[6:14], 'big')
+        mem = self.mem
+        mem.restore(snapshot[14:270])
+        mem.latches = latches
+        self.interrupt_stack = Stack()
+        for value in snapshot[270:270 + stack_size]:
+            self.interrupt_stack.push(value)
+        if self.time_travel is not None:
+            self.time_travel.clear()
+
+    def fork(self):
+        # Independent copy of the current state; ROM and XRAM pages are shared until written
+        child = Microcontroller(self.oscillator_hz)
+        child.cycles = self.cycles
+        child.rom = Rom(child, self.rom.image)
+        child.mem = self.mem.copy()
+        child.xmem = self.xmem.fork()
+        child.pc = self.pc
+        child.interrupt_stack = Stack()
+        for value in self.interrupt_stack:
+            child.interrupt_stack.push(value)
+        for opcode, handler in self._replaced_handlers.items():
+            child.register_handler(opcode, handler)
+        return child
 
     def reset_ram(self):
         self.mem = InternalDataMemory()
         self.xmem = ExternalDataMemory()
         self._pc = DoubleByte()
+        self.cycles = 0
         self.interrupt_stack = Stack()
         self.interrupt_stack.push(0)
+        if self.time_travel is not None:
+            self.time_travel.clear()
+
+    def enable_time_travel(self, capacity=100000, keyframe_interval=1000):
+        # Record the last capacity steps of next_cycle so they can be undone
+        self.time_travel = TimeTravel(self, capacity, keyframe_interval)
+
+    def disable_time_travel(self):
+        self.time_travel = None
+        self.mem.journal = self.xmem.journal = None
+
+    def step_back(self, n=1):
+        # Undo the last n steps
+        if self.time_travel is None:
+            raise RuntimeError('Time travel is not enabled')
+        self.time_travel.step_back(n)
+
+    def run_back_to(self, pc: Union[int, 'DoubleByte']):
+        # Undo steps until the PC is back at the given address; return their number
+        if self.time_travel is None:
+            raise RuntimeError('Time travel is not enabled')
+        return self.time_travel.run_back_to(pc)
+
+    def register_handler(self, opcode: int, handler):
+        # Replace the handler of an opcode, e.g. to trace or patch a single instruction;
+        # the handler is called with the instruction's arguments just like _exec_{opcode}
+        self._handlers[opcode] = handler
+        self._replaced_handlers[opcode] = handler
+        self._decoded.clear()
+        self.translator.invalidate()
+
+    def _decode(self, addr: int):
+        opcode = self.rom[addr]
+        info = OPCODES[opcode]
+        entry = (self._handlers[opcode], tuple(self.rom[addr + 1:addr + info.length]), info.length, info.cycles)
+        self._decoded[addr] = entry
+        return entry
+
+    def _invalidate_decoded(self, addr: int):
+        # An instruction is at most 3 bytes long, so a write can only affect the ones starting
+        # at most 2 bytes before the modified address
+        for start in range(addr - 2, addr + 1):
+            self._decoded.pop(start % 65536, None)
+        self.translator.invalidate()
 
     def next_cycle(self):
-        # Set/clear the parity flag
-        self.mem.p = 0 if self.mem.a.bits.count('1') % 2 else 1
+        if self.time_travel is not None:
+            self.time_travel.record()
+        self._before_operation()
+        cycles = self._execute_operation()
+        self._after_operation(cycles)
+        return cycles
+
+    def _execute_operation(self):
+        pc = int(self.pc)
+        handler, args, length, cycles = self._decoded.get(pc) or self._decode(pc)
+        self.pc += length
+        # Jump operations may override the PC
+        try:
+            handler(*args)
+        except BaseException:
+            # Leave the PC at the instruction that failed
+            self.pc = pc
+            raise
+        return cycles
+
+    def _update_parity(self):
+        if self.mem.parity_stale:
+            self.mem.update_parity()
+
+    def _before_operation(self):
+        self._update_parity()
+
+        # Nothing to detect or service
+        if not self.mem.pending_interrupts:
+            return
 
         # Check for an external interrupt request from INT0/INT1
         # that can be either negative edge-triggered or negative level-activated
@@ -110,12 +377,8 @@ class Microcontroller:
                 self.interrupt_stack.push(2)
                 self._exec_18(0, 27)
 
-        # Execute an operation
-        op = Operation(self.rom[int(self.pc)])
-        op.args = self.rom[int(self.pc + 1):int(self.pc + len(op))]
-        self.pc += len(op)
-        # Jump operations may override the PC
-        exec(f'self._exec_{op.opcode}(*op.args)')
+    def _after_operation(self, cycles: int):
+        self.cycles += cycles
 
         # Increment Timer 0
         if self.mem.tr0 and (self.mem.int0 or not self.mem.t0_gate):
@@ -125,12 +388,10 @@ class Microcontroller:
                     self.timer0.increment()
             # Increment every machine cycle
             else:
-                for _ in range(op.cycles):
-                    self.timer0.increment()
+                self.timer0.advance(cycles)
 
         if self.mem.tr1 and self.mem.t0_mode == 3:
-            for _ in range(op.cycles):
-                self.timer0.increment(mode3_th0_only=True)
+            self.timer0.advance(cycles, mode3_th0_only=True)
 
         # Increment Timer 1
         if self.mem.tr1 and (self.mem.int1 or not self.mem.t1_gate):
@@ -140,8 +401,7 @@ class Microcontroller:
                     self.timer1.increment()
             # Increment every machine cycle
             else:
-                for _ in range(op.cycles):
-                    self.timer1.increment()
+                self.timer1.advance(cycles)
 
         # Save the current state of T0, T1, INT0, INT1 for use in the next cycle
         self.mem.t0_previous_state = self.mem.t0
@@ -149,6 +409,129 @@ class Microcontroller:
         self.mem.int0_previous_state = self.mem.int0
         self.mem.int1_previous_state = self.mem.int1
 
+    def run(self, max_cycles=None, until_pc=None, breakpoints=(), translate=True):
+        # Execute instructions until one of the stop conditions is met;
+        # the instruction that exhausts max_cycles is always completed
+        start = time.perf_counter()
+        reason, cycles, instructions = self._run(max_cycles, until_pc, breakpoints, translate)
+        return StopReason(reason, cycles, instructions, time.perf_counter() - start,
+                          cycles * self.CLOCKS_PER_CYCLE / self.oscillator_hz)
+
+    def run_for_cycles(self, cycles: int, until_pc=None, breakpoints=(), translate=True):
+        # Run until the counter reaches a deadline. An instruction can't be split, so the one crossing
+        # the deadline completes; a following call continues from the deadline rather than from the
+        # counter, so e.g. running 1 ms a thousand times takes exactly the cycles of running 1 s
+        deadline = self._previous_deadline()[0] + cycles
+        return self._run_until(deadline, deadline * self.CLOCKS_PER_CYCLE / self.oscillator_hz,
+                               until_pc, breakpoints, translate)
+
+    def run_for_seconds(self, seconds: float, until_pc=None, breakpoints=(), translate=True):
+        # Simulate the given time on the device; the deadline is kept in device time too, so the
+        # fractions of a cycle lost by rounding each call's deadline still add up
+        deadline_seconds = self._previous_deadline()[1] + seconds
+        deadline = round(deadline_seconds * self.oscillator_hz / self.CLOCKS_PER_CYCLE)
+        return self._run_until(deadline, deadline_seconds, until_pc, breakpoints, translate)
+
+    def _previous_deadline(self):
+        # Deadline in cycles and device seconds of the last run_for_* call, if nothing ran since
+        if self._last_deadline is not None and self._last_deadline[1] == self.cycles:
+            return self._last_deadline[0], self._last_deadline[2]
+        return self.cycles, self.seconds
+
+    def _run_until(self, deadline: int, deadline_seconds: float, until_pc, breakpoints, translate):
+        if deadline <= self.cycles:
+            # The previous call already ran past this one's deadline
+            result = StopReason(StopReason.MAX_CYCLES, 0, 0, 0.0, 0.0)
+        else:
+            result = self.run(deadline - self.cycles, until_pc, breakpoints, translate)
+        if result.reason == StopReason.MAX_CYCLES:
+            self._last_deadline = (deadline, self.cycles, deadline_seconds)
+        else:
+            self._last_deadline = None
+        return result
+
+    def _run(self, max_cycles, until_pc, breakpoints, translate):
+        # Blocks don't go through next_cycle, so they would be missing from the undo journal
+        translate = translate and self.time_travel is None
+        breakpoints = {int(addr) for addr in breakpoints}
+        stops = breakpoints | {int(until_pc)} if until_pc is not None else breakpoints
+        cycles = 0
+        instructions = 0
+        while True:
+            halted = self._is_halted()
+            if halted and max_cycles is None:
+                return StopReason.HALT, cycles, instructions
+            # While recording, every iteration has to be a step of its own in the undo journal
+            if halted and self.time_travel is None:
+                step_cycles, step_instructions = self._skip_halt(max_cycles - cycles)
+                cycles += step_cycles
+                instructions += step_instructions
+            elif translate:
+                budget = max_cycles - cycles if max_cycles is not None else None
+                step_cycles, step_instructions = self.translator.next_block(budget, stops)
+                cycles += step_cycles
+                instructions += step_instructions
+            else:
+                cycles += self.next_cycle()
+                instructions += 1
+            pc = int(self.pc)
+            if pc == until_pc:
+                return StopReason.UNTIL_PC, cycles, instructions
+            if pc in breakpoints:
+                return StopReason.BREAKPOINT, cycles, instructions
+            if max_cycles is not None and cycles >= max_cycles:
+                return StopReason.MAX_CYCLES, cycles, instructions
+
+    def _skip_halt(self, budget: int):
+        # Only the timers run while halted, so the iterations up to the one exhausting the budget
+        # can be done at once; return the number of cycles and instructions, as stepping would
+        loop_cycles = OPCODES[self.rom[int(self.pc)]].cycles
+        iterations = max(1, -(-budget // loop_cycles))
+        self._before_operation()
+        self._after_operation(iterations * loop_cycles)
+        return iterations * loop_cycles, iterations
+
+    def _add(self, operand: int, carry: int = 0):
+        # ADD is ADDC with the carry clear
+        mem = self.mem
+        a = mem.read(224)
+        result = a + operand + carry
+        # C, AC, and OV when both operands have the same sign and the result the other one
+        flags = ((result > 255) << 7 | ((a & 15) + (operand & 15) + carry > 15) << 6
+                 | ((a ^ result) & (operand ^ result) & 128) >> 5)
+        mem.a = result & 255
+        # Replace C, AC and OV
+        mem[208] = mem.read(208) & 0b00111011 | flags
+
+    def _addc(self, operand: int):
+        self._add(operand, self.mem.c)
+
+    def _subb(self, operand: int):
+        mem = self.mem
+        a = mem.read(224)
+        carry = mem.c
+        result = a - operand - carry
+        # C, AC, and OV when the operands have different signs and the result differs from A
+        flags = ((result < 0) << 7 | ((a & 15) - (operand & 15) - carry < 0) << 6
+                 | ((a ^ operand) & (a ^ result) & 128) >> 5)
+        mem.a = result & 255
+        mem[208] = mem.read(208) & 0b00111011 | flags
+
+    def _is_halted(self):
+        # With interrupts disabled, an unconditional jump to itself (e.g. SJMP $) never ends
+        if self.mem.ea:
+            return False
+        pc = int(self.pc)
+        opcode = self.rom[pc]
+        # SJMP, LJMP, AJMP
+        if opcode != 128 and opcode != 2 and opcode % 32 != 1:
+            return False
+        # A replaced handler may do anything, so it has to be stepped
+        if self._handlers[opcode] != getattr(self, f'_exec_{opcode}'):
+            return False
+        args = [self.rom[(pc + i) % 65536] for i in range(1, OPCODES[opcode].length)]
+        return _jumps_to_itself(opcode, args, pc)
+
     def _exec_0(self):
         return
 
@@ -200,9 +583,8 @@ class Microcontroller:
         self.mem.r7 += 1
 
     def _exec_16(self, bit, offset):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        if self.mem[byte_no][7 - bit % 8]:
-            self.mem[byte_no][7 - bit % 8] = 0
+        if self.mem.read_bit(bit):
+            self.mem.write_bit(bit, 0)
             # Convert from two's complement representation
             self.pc += offset - 256 if offset > 127 else offset
 
@@ -264,8 +646,7 @@ class Microcontroller:
         self.mem.r7 -= 1
 
     def _exec_32(self, bit, offset):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        if self.mem[byte_no][7 - bit % 8]:
+        if self.mem.read_bit(bit):
             # Convert from two's complement representation
             self.pc += offset - 256 if offset > 127 else offset
 
@@ -283,116 +664,43 @@ class Microcontroller:
         self.mem.a.rotate_left()
 
     def _exec_36(self, immed):
-        self.mem.c = 1 if int(self.mem.a) + immed > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(f'{immed:08b}'[4:], 2) > 15 else 0
-        # Convert A and immed as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        immed_signed = immed - 256 if immed > 127 else immed
-        self.mem.ov = 1 if not -129 < a_signed + immed_signed < 128 else 0
-        self.mem.a += immed
+        self._add(immed)
 
     def _exec_37(self, direct):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem[direct]) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[direct].bits[4:], 2) > 15 else 0
-        # Convert A and mem[direct] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_direct_signed = int(self.mem[direct]) - 256 if self.mem[direct] > 127 else int(self.mem[direct])
-        self.mem.ov = 1 if not -129 < a_signed + mem_direct_signed < 128 else 0
-        self.mem.a += self.mem[direct]
+        self._add(self.mem.read(direct))
 
     def _exec_38(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem[self.mem.r0]) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[self.mem.r0].bits[4:], 2) > 15 else 0
-        # Convert A and mem[r0] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r0_signed = int(self.mem[self.mem.r0]) - 256 if self.mem[self.mem.r0] > 127 else int(self.mem[self.mem.r0])
-        self.mem.ov = 1 if not -129 < a_signed + mem_r0_signed < 128 else 0
-        self.mem.a += self.mem[self.mem.r0]
+        self._add(self.mem.read(int(self.mem.r0)))
 
     def _exec_39(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem[self.mem.r1]) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[self.mem.r1].bits[4:], 2) > 15 else 0
-        # Convert A and mem[r1] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r1_signed = int(self.mem[self.mem.r1]) - 256 if self.mem[self.mem.r1] > 127 else int(self.mem[self.mem.r1])
-        self.mem.ov = 1 if not -129 < a_signed + mem_r1_signed < 128 else 0
-        self.mem.a += self.mem[self.mem.r1]
+        self._add(self.mem.read(int(self.mem.r1)))
 
     def _exec_40(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r0) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r0.bits[4:], 2) > 15 else 0
-        # Convert A and R0 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r0_signed = int(self.mem.r0) - 256 if self.mem.r0 > 127 else int(self.mem.r0)
-        self.mem.ov = 1 if not -129 < a_signed + r0_signed < 128 else 0
-        self.mem.a += self.mem.r0
+        self._add(int(self.mem.r0))
 
     def _exec_41(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r1) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r1.bits[4:], 2) > 15 else 0
-        # Convert A and R1 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r1_signed = int(self.mem.r1) - 256 if self.mem.r1 > 127 else int(self.mem.r1)
-        self.mem.ov = 1 if not -129 < a_signed + r1_signed < 128 else 0
-        self.mem.a += self.mem.r1
+        self._add(int(self.mem.r1))
 
     def _exec_42(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r2) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r2.bits[4:], 2) > 15 else 0
-        # Convert A and R2 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r2_signed = int(self.mem.r2) - 256 if self.mem.r2 > 127 else int(self.mem.r2)
-        self.mem.ov = 1 if not -129 < a_signed + r2_signed < 128 else 0
-        self.mem.a += self.mem.r2
+        self._add(int(self.mem.r2))
 
     def _exec_43(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r3) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r3.bits[4:], 2) > 15 else 0
-        # Convert A and R3 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r3_signed = int(self.mem.r3) - 256 if self.mem.r3 > 127 else int(self.mem.r3)
-        self.mem.ov = 1 if not -129 < a_signed + r3_signed < 128 else 0
-        self.mem.a += self.mem.r3
+        self._add(int(self.mem.r3))
 
     def _exec_44(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r4) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r4.bits[4:], 2) > 15 else 0
-        # Convert A and R4 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r4_signed = int(self.mem.r4) - 256 if self.mem.r4 > 127 else int(self.mem.r4)
-        self.mem.ov = 1 if not -129 < a_signed + r4_signed < 128 else 0
-        self.mem.a += self.mem.r4
+        self._add(int(self.mem.r4))
 
     def _exec_45(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r5) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r5.bits[4:], 2) > 15 else 0
-        # Convert A and R5 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r5_signed = int(self.mem.r5) - 256 if self.mem.r5 > 127 else int(self.mem.r5)
-        self.mem.ov = 1 if not -129 < a_signed + r5_signed < 128 else 0
-        self.mem.a += self.mem.r5
+        self._add(int(self.mem.r5))
 
     def _exec_46(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r6) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r6.bits[4:], 2) > 15 else 0
-        # Convert A and R6 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r6_signed = int(self.mem.r6) - 256 if self.mem.r6 > 127 else int(self.mem.r6)
-        self.mem.ov = 1 if not -129 < a_signed + r6_signed < 128 else 0
-        self.mem.a += self.mem.r6
+        self._add(int(self.mem.r6))
 
     def _exec_47(self):
-        self.mem.c = 1 if int(self.mem.a) + int(self.mem.r7) > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r7.bits[4:], 2) > 15 else 0
-        # Convert A and R7 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r7_signed = int(self.mem.r7) - 256 if self.mem.r7 > 127 else int(self.mem.r7)
-        self.mem.ov = 1 if not -129 < a_signed + r7_signed < 128 else 0
-        self.mem.a += self.mem.r7
+        self._add(int(self.mem.r7))
 
     def _exec_48(self, bit, offset):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        if not self.mem[byte_no][7 - bit % 8]:
+        if not self.mem.read_bit(bit):
             # Convert from two's complement representation
             self.pc += offset - 256 if offset > 127 else offset
 
@@ -417,124 +725,40 @@ class Microcontroller:
         self.mem.c = most_significant_bit
 
     def _exec_52(self, immed):
-        c = 1 if int(self.mem.a) + immed + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(f'{immed:08b}'[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and immed as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        immed_signed = immed - 256 if immed > 127 else immed
-        self.mem.ov = 1 if not -129 < a_signed + immed_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + immed
-        self.mem.c = c
+        self._addc(immed)
 
     def _exec_53(self, direct):
-        c = 1 if int(self.mem.a) + int(self.mem[direct]) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[direct].bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and mem[direct] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_direct_signed = int(self.mem[direct]) - 256 if self.mem[direct] > 127 else int(self.mem[direct])
-        self.mem.ov = 1 if not -129 < a_signed + mem_direct_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem[direct]
-        self.mem.c = c
+        self._addc(self.mem.read(direct))
 
     def _exec_54(self):
-        c = 1 if int(self.mem.a) + int(self.mem[self.mem.r0]) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[self.mem.r0].bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and mem[r0] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r0_signed = int(self.mem[self.mem.r0]) - 256 if self.mem[self.mem.r0] > 127 else int(self.mem[self.mem.r0])
-        self.mem.ov = 1 if not -129 < a_signed + mem_r0_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem[self.mem.r0]
-        self.mem.c = c
+        self._addc(self.mem.read(int(self.mem.r0)))
 
     def _exec_55(self):
-        c = 1 if int(self.mem.a) + int(self.mem[self.mem.r1]) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem[self.mem.r1].bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and mem[r1] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r1_signed = int(self.mem[self.mem.r1]) - 256 if self.mem[self.mem.r1] > 127 else int(self.mem[self.mem.r1])
-        self.mem.ov = 1 if not -129 < a_signed + mem_r1_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem[self.mem.r1]
-        self.mem.c = c
+        self._addc(self.mem.read(int(self.mem.r1)))
 
     def _exec_56(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r0) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r0.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R0 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r0_signed = int(self.mem.r0) - 256 if self.mem.r0 > 127 else int(self.mem.r0)
-        self.mem.ov = 1 if not -129 < a_signed + r0_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r0
-        self.mem.c = c
+        self._addc(int(self.mem.r0))
 
     def _exec_57(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r1) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r1.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R1 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r1_signed = int(self.mem.r1) - 256 if self.mem.r1 > 127 else int(self.mem.r1)
-        self.mem.ov = 1 if not -129 < a_signed + r1_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r1
-        self.mem.c = c
+        self._addc(int(self.mem.r1))
 
     def _exec_58(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r2) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r2.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R2 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r2_signed = int(self.mem.r2) - 256 if self.mem.r2 > 127 else int(self.mem.r2)
-        self.mem.ov = 1 if not -129 < a_signed + r2_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r2
-        self.mem.c = c
+        self._addc(int(self.mem.r2))
 
     def _exec_59(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r3) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r3.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R3 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r3_signed = int(self.mem.r3) - 256 if self.mem.r3 > 127 else int(self.mem.r3)
-        self.mem.ov = 1 if not -129 < a_signed + r3_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r3
-        self.mem.c = c
+        self._addc(int(self.mem.r3))
 
     def _exec_60(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r4) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r4.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R4 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r4_signed = int(self.mem.r4) - 256 if self.mem.r4 > 127 else int(self.mem.r4)
-        self.mem.ov = 1 if not -129 < a_signed + r4_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r4
-        self.mem.c = c
+        self._addc(int(self.mem.r4))
 
     def _exec_61(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r5) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r5.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R5 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r5_signed = int(self.mem.r5) - 256 if self.mem.r5 > 127 else int(self.mem.r5)
-        self.mem.ov = 1 if not -129 < a_signed + r5_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r5
-        self.mem.c = c
+        self._addc(int(self.mem.r5))
 
     def _exec_62(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r6) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r6.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R6 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r6_signed = int(self.mem.r6) - 256 if self.mem.r6 > 127 else int(self.mem.r6)
-        self.mem.ov = 1 if not -129 < a_signed + r6_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r6
-        self.mem.c = c
+        self._addc(int(self.mem.r6))
 
     def _exec_63(self):
-        c = 1 if int(self.mem.a) + int(self.mem.r7) + self.mem.c > 255 else 0
-        self.mem.ac = 1 if int(self.mem.a.bits[4:], 2) + int(self.mem.r7.bits[4:], 2) + self.mem.c > 15 else 0
-        # Convert A and R7 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r7_signed = int(self.mem.r7) - 256 if self.mem.r7 > 127 else int(self.mem.r7)
-        self.mem.ov = 1 if not -129 < a_signed + r7_signed + self.mem.c < 128 else 0
-        self.mem.a += self.mem.c + self.mem.r7
-        self.mem.c = c
+        self._addc(int(self.mem.r7))
 
     def _exec_64(self, offset):
         if self.mem.c:
@@ -703,11 +927,10 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}011{addr11:08b}', 2)
 
     def _exec_114(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem.c |= self.mem[byte_no][7 - bit % 8]
+        self.mem.c |= self.mem.read_bit(bit)
 
     def _exec_115(self):
-        self.pc = self.mem.dptr + self.mem.a
+        self.pc = self.mem.read_dptr() + self.mem.read(224)
 
     def _exec_116(self, immed):
         self.mem.a = immed
@@ -753,8 +976,7 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}100{addr11:08b}', 2)
 
     def _exec_130(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem.c &= self.mem[byte_no][7 - bit % 8]
+        self.mem.c &= self.mem.read_bit(bit)
 
     def _exec_131(self):
         self.mem.a = self.rom[int(self.pc + self.mem.a)]
@@ -797,8 +1019,9 @@ class Microcontroller:
     def _exec_143(self, direct):
         self.mem[direct] = self.mem.r7
 
-    def _exec_144(self, immed):
-        self.mem.dptr = immed
+    def _exec_144(self, high_order_byte, low_order_byte):
+        self.mem[130] = high_order_byte
+        self.mem[131] = low_order_byte
 
     def _exec_145(self, addr11):
         self.mem.sp += 1
@@ -808,145 +1031,58 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}100{addr11:08b}', 2)
 
     def _exec_146(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem[byte_no][7 - bit % 8] = self.mem.c
+        self.mem.write_bit(bit, self.mem.c)
 
     def _exec_147(self):
-        self.mem.a = self.rom[int(self.mem.dptr + self.mem.a)]
+        self.mem.a = self.rom[(self.mem.read_dptr() + self.mem.read(224)) % 65536]
 
     def _exec_148(self, immed):
-        c = 1 if immed > self.mem.a else 0
-        self.mem.ac = 1 if int(f'{immed:08b}'[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and immed as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        immed_signed = immed - 256 if immed > 127 else immed
-        self.mem.ov = 1 if not -129 < a_signed - immed_signed < 128 else 0
-        self.mem.a -= self.mem.c + immed
-        self.mem.c = c
+        self._subb(immed)
 
     def _exec_149(self, direct):
-        c = 1 if self.mem[direct] > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem[direct].bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and mem[direct] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_direct_signed = int(self.mem[direct]) - 256 if self.mem[direct] > 127 else int(self.mem[direct])
-        self.mem.ov = 1 if not -129 < a_signed - mem_direct_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem[direct]
-        self.mem.c = c
+        self._subb(self.mem.read(direct))
 
     def _exec_150(self):
-        c = 1 if self.mem[self.mem.r0] > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem[self.mem.r0].bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and mem[r0] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r0_signed = int(self.mem[self.mem.r0]) - 256 if self.mem[self.mem.r0] > 127 else int(self.mem[self.mem.r0])
-        self.mem.ov = 1 if not -129 < a_signed - mem_r0_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem[self.mem.r0]
-        self.mem.c = c
+        self._subb(self.mem.read(int(self.mem.r0)))
 
     def _exec_151(self):
-        c = 1 if self.mem[self.mem.r1] > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem[self.mem.r1].bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and mem[r1] as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        mem_r1_signed = int(self.mem[self.mem.r1]) - 256 if self.mem[self.mem.r1] > 127 else int(self.mem[self.mem.r1])
-        self.mem.ov = 1 if not -129 < a_signed - mem_r1_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem[self.mem.r1]
-        self.mem.c = c
+        self._subb(self.mem.read(int(self.mem.r1)))
 
     def _exec_152(self):
-        c = 1 if self.mem.r0 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r0.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R0 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r0_signed = int(self.mem.r0) - 256 if self.mem.r0 > 127 else int(self.mem.r0)
-        self.mem.ov = 1 if not -129 < a_signed - r0_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r0
-        self.mem.c = c
+        self._subb(int(self.mem.r0))
 
     def _exec_153(self):
-        c = 1 if self.mem.r1 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r1.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R1 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r1_signed = int(self.mem.r1) - 256 if self.mem.r1 > 127 else int(self.mem.r1)
-        self.mem.ov = 1 if not -129 < a_signed - r1_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r1
-        self.mem.c = c
+        self._subb(int(self.mem.r1))
 
     def _exec_154(self):
-        c = 1 if self.mem.r2 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r2.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R2 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r2_signed = int(self.mem.r2) - 256 if self.mem.r2 > 127 else int(self.mem.r2)
-        self.mem.ov = 1 if not -129 < a_signed - r2_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r2
-        self.mem.c = c
+        self._subb(int(self.mem.r2))
 
     def _exec_155(self):
-        c = 1 if self.mem.r3 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r3.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R3 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r3_signed = int(self.mem.r3) - 256 if self.mem.r3 > 127 else int(self.mem.r3)
-        self.mem.ov = 1 if not -129 < a_signed - r3_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r3
-        self.mem.c = c
+        self._subb(int(self.mem.r3))
 
     def _exec_156(self):
-        c = 1 if self.mem.r4 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r4.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R4 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r4_signed = int(self.mem.r4) - 256 if self.mem.r4 > 127 else int(self.mem.r4)
-        self.mem.ov = 1 if not -129 < a_signed - r4_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r4
-        self.mem.c = c
+        self._subb(int(self.mem.r4))
 
     def _exec_157(self):
-        c = 1 if self.mem.r5 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r5.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R5 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r5_signed = int(self.mem.r5) - 256 if self.mem.r5 > 127 else int(self.mem.r5)
-        self.mem.ov = 1 if not -129 < a_signed - r5_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r5
-        self.mem.c = c
+        self._subb(int(self.mem.r5))
 
     def _exec_158(self):
-        c = 1 if self.mem.r6 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r6.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R6 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r6_signed = int(self.mem.r6) - 256 if self.mem.r6 > 127 else int(self.mem.r6)
-        self.mem.ov = 1 if not -129 < a_signed - r6_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r6
-        self.mem.c = c
+        self._subb(int(self.mem.r6))
 
     def _exec_159(self):
-        c = 1 if self.mem.r7 > self.mem.a else 0
-        self.mem.ac = 1 if int(self.mem.r7.bits[4:], 2) > int(self.mem.a.bits[4:], 2) else 0
-        # Convert A and R7 as if they were two's complement numbers
-        a_signed = int(self.mem.a) - 256 if self.mem.a > 127 else int(self.mem.a)
-        r7_signed = int(self.mem.r7) - 256 if self.mem.r7 > 127 else int(self.mem.r7)
-        self.mem.ov = 1 if not -129 < a_signed - r7_signed < 128 else 0
-        self.mem.a -= self.mem.c + self.mem.r7
-        self.mem.c = c
+        self._subb(int(self.mem.r7))
 
     def _exec_160(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem.c |= not self.mem[byte_no][7 - bit % 8]
+        self.mem.c |= not self.mem.read_bit(bit)
 
     def _exec_161(self, addr11):
         self.pc = int(f'{self.pc.bits[:5]}101{addr11:08b}', 2)
 
     def _exec_162(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem.c = self.mem[byte_no][7 - bit % 8]
+        self.mem.c = self.mem.read_bit(bit)
 
     def _exec_163(self):
-        self.mem.dptr += 1
+        self.mem.dptr = self.mem.read_dptr() + 1
 
     def _exec_164(self):
         self.mem.b, self.mem.a = self.mem.a * self.mem.b
@@ -987,8 +1123,7 @@ class Microcontroller:
         self.mem.r7 = self.mem[direct]
 
     def _exec_176(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem.c &= not self.mem[byte_no][7 - bit % 8]
+        self.mem.c &= not self.mem.read_bit(bit)
 
     def _exec_177(self, addr11):
         self.mem.sp += 1
@@ -998,8 +1133,7 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}101{addr11:08b}', 2)
 
     def _exec_178(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem[byte_no][7 - bit % 8] = not self.mem[byte_no][7 - bit % 8]
+        self.mem.write_bit(bit, not self.mem.read_bit(bit))
 
     def _exec_179(self):
         self.mem.c = not self.mem.c
@@ -1084,8 +1218,7 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}110{addr11:08b}', 2)
 
     def _exec_194(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem[byte_no][7 - bit % 8] = 0
+        self.mem.write_bit(bit, 0)
 
     def _exec_195(self):
         self.mem.c = 0
@@ -1139,21 +1272,16 @@ class Microcontroller:
         self.pc = int(f'{self.pc.bits[:5]}110{addr11:08b}', 2)
 
     def _exec_210(self, bit):
-        byte_no = bit // 8 + 32 if bit < 128 else bit // 8 * 8
-        self.mem[byte_no][7 - bit % 8] = 1
+        self.mem.write_bit(bit, 1)
 
     def _exec_211(self):
         self.mem.c = 1
 
     def _exec_212(self):
-        if self.mem.ac or int(self.mem.a.bits[4:], 2) > 9:
-            if int(self.mem.a) + 6 > 255:
-                self.mem.c = 1
-            self.mem.a += 6
-        if self.mem.c or int(self.mem.a.bits[:4], 2) > 9:
-            if int(self.mem.a) + 96 > 255:
-                self.mem.c = 1
-            self.mem.a += 96
+        mem = self.mem
+        i = mem.c << 9 | mem.ac << 8 | mem.read(224)
+        mem.a = DA_RESULTS[i]
+        mem.c = DA_CARRIES[i]
 
     def _exec_213(self, direct, offset):
         self.mem[direct] -= 1
@@ -1220,16 +1348,16 @@ class Microcontroller:
             self.pc += offset - 256 if offset > 127 else offset
 
     def _exec_224(self):
-        self.mem.a = self.xmem[self.mem.dptr]
+        self.mem.a = self.xmem.read(self.mem.read_dptr())
 
     def _exec_225(self, addr11):
         self.pc = int(f'{self.pc.bits[:5]}111{addr11:08b}', 2)
 
     def _exec_226(self):
-        self.mem.a = self.xmem[int(self.mem.p2.bits + self.mem.r0.bits, 2)]
+        self.mem.a = self.xmem.read(self.mem.read(160) << 8 | self.mem.read(self.mem.bank_base))
 
     def _exec_227(self):
-        self.mem.a = self.xmem[int(self.mem.p2.bits + self.mem.r1.bits, 2)]
+        self.mem.a = self.xmem.read(self.mem.read(160) << 8 | self.mem.read(self.mem.bank_base + 1))
 
     def _exec_228(self):
         self.mem.a = 0
@@ -1268,7 +1396,7 @@ class Microcontroller:
         self.mem.a = self.mem.r7
 
     def _exec_240(self):
-        self.xmem[self.mem.dptr] = self.mem.a
+        self.xmem[self.mem.read_dptr()] = self.mem.read(224)
 
     def _exec_241(self, addr11):
         self.mem.sp += 1
@@ -1320,10 +1448,394 @@ class Microcontroller:
         self.mem.r7 = self.mem.a
 
 
+class BlockTranslator:
+    # Straight-line code is translated into one Python function per basic block. A block ends after
+    # a jump and never contains an instruction that could observe or change the state handled
+    # between instructions (timers, interrupts, port pins, parity), so running it and then updating
+    # the timers once with the total number of cycles gives the same result as stepping through it
+    _max_block_length = 64
+    # TCON, TMOD, TL0, TL1, TH0, TH1, P3, IE, IP, PSW
+    _sensitive_addrs = frozenset((136, 137, 138, 139, 140, 141, 176, 168, 184, 208))
+    _branches = frozenset(('AJMP', 'LJMP', 'SJMP', 'JMP', 'JB', 'JBC', 'JNB', 'JC', 'JNC', 'JZ', 'JNZ',
+                           'CJNE', 'DJNZ'))
+    # Instructions touching the stack or addressing through @R0/@R1 may reach any SFR
+    _stack_operations = frozenset(('ACALL', 'LCALL', 'RET', 'RETI', 'PUSH', 'POP'))
+    # Jumps to themselves that only a timer overflow, an interrupt or a counter can leave
+    _idle_loops = frozenset(('AJMP', 'LJMP', 'SJMP', 'JB', 'JNB', 'JC', 'JNC', 'JZ', 'JNZ', 'DJNZ'))
+
+    def __init__(self, mc: 'Microcontroller'):
+        self._mc = mc
+        # Start address -> Block, or None if the instruction there has to be stepped
+        self._blocks = {}
+
+    def invalidate(self):
+        if self._blocks:
+            self._blocks.clear()
+
+    def next_block(self, budget=None, stops=frozenset()):
+        # Execute a whole block if that is indistinguishable from stepping through it,
+        # otherwise a single instruction; return the number of cycles and instructions executed
+        mc = self._mc
+        mc._before_operation()
+        pc = int(mc.pc)
+        if pc in self._blocks:
+            block = self._blocks[pc]
+        else:
+            block = self._blocks[pc] = self._translate(pc)
+
+        if block is not None and block.idle:
+            return self._fast_forward(block, budget, stops)
+
+        if (block is None or budget is not None and block.cycles > budget
+                or not stops.isdisjoint(block.inner) or self._timer_interrupt_possible()):
+            cycles = mc._execute_operation()
+            mc._after_operation(cycles)
+            return cycles, 1
+
+        block.function()
+        mc._after_operation(block.cycles)
+        return block.cycles, len(block.addrs)
+
+    def _timer_interrupt_possible(self):
+        # An overflow inside a block would be serviced late
+        mem = self._mc.mem
+        return mem.ea and (mem.et0 or mem.et1) and (mem.tr0 or mem.tr1)
+
+    def _fast_forward(self, block: 'Block', budget, stops):
+        # An idle loop is an instruction jumping to itself until a timer overflows, an interrupt
+        # is serviced or (for DJNZ) the counter runs out. Inputs can only change between runs,
+        # so after one regular iteration the following ones can be skipped up to the next event
+        mc = self._mc
+        addr = block.addrs[0]
+        headroom = self._timer_headroom()
+        cycles = mc._execute_operation()
+        mc._after_operation(cycles)
+        if int(mc.pc) != addr or addr in stops:
+            return cycles, 1
+
+        # Upper bounds on the number of iterations, including the one above
+        limits = []
+        if headroom is not None:
+            # No timer may overflow before the last skipped iteration ends
+            limits.append((headroom - 1) // cycles)
+        if budget is not None:
+            # Stepping would stop after the iteration that exhausts the budget
+            limits.append(-(-budget // cycles))
+        counter_addr = self._idle_counter_addr(addr)
+        if counter_addr is not None:
+            # The iteration that decrements the counter to 0 leaves the loop
+            limits.append(int(mc.mem[counter_addr]))
+        if not limits or min(limits) < 2:
+            return cycles, 1
+
+        iterations = min(limits)
+        # Without overflows or edges at T0/T1 the skipped iterations only move the timers
+        mc._after_operation((iterations - 1) * cycles)
+        if counter_addr is not None:
+            mc.mem[counter_addr] -= iterations - 1
+        return iterations * cycles, iterations
+
+    def _timer_headroom(self):
+        # Machine cycles before one of the timers incremented every cycle overflows
+        mc = self._mc
+        mem = mc.mem
+        headroom = []
+        if mem.tr0 and (mem.int0 or not mem.t0_gate) and not mem.t0_ct:
+            headroom.append(mc.timer0.increments_to_overflow())
+        if mem.tr1 and mem.t0_mode == 3:
+            headroom.append(mc.timer0.increments_to_overflow(mode3_th0_only=True))
+        if mem.tr1 and (mem.int1 or not mem.t1_gate) and not mem.t1_ct:
+            headroom.append(mc.timer1.increments_to_overflow())
+        headroom = [increments for increments in headroom if increments is not None]
+        return min(headroom) if headroom else None
+
+    def _idle_counter_addr(self, addr: int):
+        # Address of the counter decremented by a DJNZ loop
+        mc = self._mc
+        opcode = mc.rom[addr]
+        if opcode == 213:
+            return mc.rom[(addr + 1) % 65536]
+        if 216 <= opcode <= 223:
+            return mc.mem.bank_base + opcode - 216
+        return None
+
+    def _is_idle_loop(self, opcode: int, addr: int):
+        mc = self._mc
+        name = OPCODES[opcode].name
+        if name is None or mc._handlers[opcode] != getattr(mc, f'_exec_{opcode}'):
+            return False
+        if name not in self._idle_loops:
+            return False
+        _, args, _, _ = mc._decoded.get(addr) or mc._decode(addr)
+        if opcode == 213 and args[0] > 127:
+            # DJNZ on an SFR
+            return False
+        return _jumps_to_itself(opcode, args, addr)
+
+    def _translate(self, start: int):
+        mc = self._mc
+        if self._is_idle_loop(mc.rom[start], start):
+            _, _, _, cycles = mc._decoded.get(start) or mc._decode(start)
+            return Block([start], cycles, None, idle=True)
+
+        addrs = []
+        cycles = 0
+        addr = start
+        while len(addrs) < self._max_block_length and addr < 65536:
+            opcode = mc.rom[addr]
+            if not self._is_translatable(opcode, addr):
+                break
+            handler, args, length, op_cycles = mc._decoded.get(addr) or mc._decode(addr)
+            if addrs and _jumps_to_itself(opcode, args, addr):
+                break
+            addrs.append(addr)
+            cycles += op_cycles
+            addr += length
+            if OPCODES[opcode].name in self._branches:
+                break
+
+        if not addrs:
+            return None
+
+        namespace = {'mc': mc, 'fail': self._failure_handler(addrs)}
+        # i is the index of the instruction being executed, in case it raises an exception
+        lines = ['def block():', '    i = 0', '    try:']
+        for idx, addr in enumerate(addrs):
+            handler, args, length, _ = mc._decoded.get(addr) or mc._decode(addr)
+            namespace[f'h{idx}'] = handler
+            if idx:
+                lines.append(f'        i = {idx}')
+            if idx == len(addrs) - 1:
+                # The parity flag is set from A as left by the previous instruction
+                if idx:
+                    lines.append('        mc._update_parity()')
+                lines.append(f'        mc.pc = {addr + length}')
+            elif mc.rom[addr] == 131:
+                # MOVC A, @A+PC
+                lines.append(f'        mc.pc = {addr + length}')
+            lines.append(f'        h{idx}({", ".join(str(arg) for arg in args)})')
+        lines += ['    except BaseException:', '        fail(i)', '        raise']
+        exec('\n'.join(lines), namespace)
+        return Block(addrs, cycles, namespace['block'])
+
+    def _failure_handler(self, addrs):
+        # Leave the state as stepping would have when an instruction of the block raises an exception:
+        # the ones before it completed and the PC at the failing one
+        mc = self._mc
+        completed_cycles = [0]
+        for addr in addrs[:-1]:
+            completed_cycles.append(completed_cycles[-1] + OPCODES[mc.rom[addr]].cycles)
+
+        def fail(idx: int):
+            mc.pc = addrs[idx]
+            if idx:
+                mc._after_operation(completed_cycles[idx])
+                mc._update_parity()
+        return fail
+
+    def _is_translatable(self, opcode: int, addr: int):
+        mc = self._mc
+        info = OPCODES[opcode]
+        if info.name is None or mc._handlers[opcode] != getattr(mc, f'_exec_{opcode}'):
+            return False
+        if info.name in self._stack_operations or '@R' in info.mnemonic and info.name != 'MOVX':
+            return False
+        _, args, _, _ = mc._decoded.get(addr) or mc._decode(addr)
+        for kind, arg in zip(info.operand_kinds, args):
+            if kind in ('direct', 'src_direct', 'dest_direct') and arg in self._sensitive_addrs:
+                return False
+            if kind == 'bit' and BIT_ADDRESSES[arg][0] in self._sensitive_addrs:
+                return False
+        return True
+
+
+class Block:
+    def __init__(self, addrs, cycles: int, function, idle=False):
+        # Start addresses of the instructions, in order of execution
+        self.addrs = addrs
+        # Addresses that can't be stopped at when the block is executed as a whole
+        self.inner = frozenset(addrs[1:])
+        self.cycles = cycles
+        self.function = function
+        # A single instruction jumping to itself, fast-forwarded instead of translated
+        self.idle = idle
+
+
+class TimeTravel:
+    # Every step records what it overwrites, and every keyframe_interval steps also a copy of the
+    # whole state, so going back n steps never undoes more than keyframe_interval of them
+    def __init__(self, mc: 'Microcontroller', capacity: int, keyframe_interval: int):
+        if capacity < 1 or keyframe_interval < 1:
+            raise ValueError('The capacity and the keyframe interval have to be positive')
+        self._mc = mc
+        self._keyframe_interval = keyframe_interval
+        # Per step, taken before it: (PC, interrupt stack, pin latches, cycle counter,
+        # [address, previous value, ...], keyframe or None); the oldest steps are dropped once the capacity is reached
+        self._steps = deque(maxlen=capacity)
+        # Number of steps recorded since the last clear, including the dropped ones
+        self._count = 0
+
+    def __len__(self):
+        return len(self._steps)
+
+    def clear(self):
+        self._steps.clear()
+        self._count = 0
+
+    def record(self):
+        # Called at the start of a step
+        mc = self._mc
+        mem = mc.mem
+        keyframe = None
+        if self._count % self._keyframe_interval == 0:
+            # Internal RAM and XRAM, the latter sharing its pages until either side writes to one
+            keyframe = bytes(mem), mc.xmem.fork()
+        writes = []
+        self._steps.append((int(mc.pc), tuple(mc.interrupt_stack), mem.latches, mc.cycles, writes, keyframe))
+        self._count += 1
+        mem.journal = mc.xmem.journal = writes
+
+    def step_back(self, n: int):
+        if not 0 <= n <= len(self._steps):
+            raise ValueError(f'Only {len(self._steps)} steps can be undone')
+        if not n:
+            return
+        mc = self._mc
+        mem = mc.mem
+        xmem = mc.xmem
+        mem.journal = xmem.journal = None
+        # Newest first, so the last one is the step to go back to
+        undone = [self._steps.pop() for _ in range(n)]
+        self._count -= n
+
+        # Either undo all the steps or jump to the oldest keyframe among them and undo the rest
+        start = 0
+        for index in range(n - 1, -1, -1):
+            keyframe = undone[index][5]
+            if keyframe is not None:
+                mem._data[:] = keyframe[0]
+                xmem.share_pages(keyframe[1])
+                start = index + 1
+                break
+        data = mem._data
+        for index in range(start, n):
+            writes = undone[index][4]
+            for i in range(len(writes) - 2, -1, -2):
+                addr = writes[i]
+                if addr < 256:
+                    data[addr] = writes[i + 1]
+                else:
+                    xmem[addr - 256] = writes[i + 1]
+
+        pc, stack, latches, cycles, _, _ = undone[-1]
+        mc.pc = pc
+        mc.cycles = cycles
+        mc.interrupt_stack = Stack()
+        for value in stack:
+            mc.interrupt_stack.push(value)
+        mem.latches = latches
+        mem.refresh()
+
+    def run_back_to(self, pc: Union[int, 'DoubleByte']):
+        # Go back to the latest recorded step that started at the given address
+        pc = int(pc)
+        for n, step in enumerate(reversed(self._steps), 1):
+            if step[0] == pc:
+                self.step_back(n)
+                return n
+        raise ValueError(f'{pc:04X}h is not in the recorded steps')
+
+
+class Rom:
+    # 64 KiB of zeros shared by all empty ROMs
+    _blank = bytes(65536)
+
+    def __init__(self, mc: 'Microcontroller', image: Union[bytes, bytearray, None] = None):
+        self._mc = mc
+        if image is None:
+            image = self._blank
+        elif len(image) > 65536:
+            raise ValueError('ROM image larger than 64 KiB')
+        elif type(image) is not bytes or len(image) < 65536:
+            image = bytes(image) + bytes(65536 - len(image))
+        # An immutable image can be shared between ROMs; it's copied on the first write
+        self._data = image
+        # Computed on demand, until the next write
+        self._digest = None
+
+    def __getitem__(self, addr: Union[int, slice]):
+        return self._data[addr]
+
+    def __setitem__(self, addr: Union[int, slice], value):
+        if type(self._data) is bytes:
+            self._data = bytearray(self._data)
+        self._data[addr] = value
+        self._digest = None
+        # Drop the predecoded instructions that overlap the modified bytes
+        if isinstance(addr, slice):
+            self._mc._decoded.clear()
+            self._mc.translator.invalidate()
+        else:
+            self._mc._invalidate_decoded(addr)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __bytes__(self):
+        return bytes(self._data)
+
+    def load(self, chunks):
+        # Copy (addr, data) chunks in, dropping the predecoded instructions once;
+        # return the number of bytes copied
+        if type(self._data) is bytes:
+            self._data = bytearray(self._data)
+        byte_count = 0
+        for addr, data in chunks:
+            if addr + len(data) > 65536:
+                raise ValueError(f'Data at {addr:X}h does not fit in ROM')
+            self._data[addr:addr + len(data)] = data
+            byte_count += len(data)
+        self._digest = None
+        self._mc._decoded.clear()
+        self._mc.translator.invalidate()
+        return byte_count
+
+    @property
+    def image(self):
+        # Read-only contents, which other ROMs can be created from without copying
+        if type(self._data) is not bytes:
+            self._data = bytes(self._data)
+        return self._data
+
+    @property
+    def digest(self):
+        # SHA-1 of the contents, e.g. to key caches by without copying or freezing them
+        if self._digest is None:
+            self._digest = hashlib.sha1(self._data).digest()
+        return self._digest
+
+
 class InternalDataMemory:
+    # TCON, IE and P3 decide whether an interrupt has to be detected or serviced
+    _interrupt_sources = frozenset((136, 168, 176))
+
     def __init__(self):
-        self._data = [Byte() for _ in range(256)]
-        self._dptr = DoubleByte()
+        self._data = bytearray(256)
+        self.read = self._data.__getitem__
+        # Byte views of the addresses, created on first access
+        self._views = [None] * 256
+        self.pending_interrupts = 0
+        # Address of R0 in the register bank selected by RS1 and RS0
+        self.bank_base = 0
+        # Whether A or PSW was written since P was last set
+        self.parity_stale = True
+        # List getting (address, previous value) of every write while time travel is enabled
+        self.journal = None
+        # DPH and DPL seen as one register
+        self._dptr = DoubleByteView(self, 130)
         self.sp = 7
         self.p0 = 0b11111111
         self.p1 = 0b11111111
@@ -1335,26 +1847,87 @@ class InternalDataMemory:
         self.int1_previous_state = 1
 
     def __getitem__(self, addr: Union[int, 'Byte']):
-        return self._data[int(addr)]
+        addr = int(addr)
+        view = self._views[addr]
+        if view is None:
+            view = self._views[addr] = ByteView(self, addr)
+        return view
 
     def __setitem__(self, addr, value: Union[int, 'Byte']):
-        self[addr].value = value
-
-    @property
-    def p0(self):
-        return self[128]
-
-    @p0.setter
-    def p0(self, value):
-        self[128].value = value
-
-    @property
-    def sp(self):
-        return self[129]
-
-    @sp.setter
-    def sp(self, value):
-        self[129].value = value
+        # Every write ends up here, including the ones made through Byte views
+        addr = int(addr)
+        value = int(value) % 256
+        if self.journal is not None:
+            self.journal += (addr, self._data[addr])
+        self._data[addr] = value
+        if addr == 208:
+            self.bank_base = value & 0b00011000
+            self.parity_stale = True
+        elif addr == 224:
+            self.parity_stale = True
+        elif addr in self._interrupt_sources:
+            self._update_pending_interrupts()
+
+    def _set_bit(self, addr: int, mask: int, value: Union[int, bool, str]):
+        self[addr] = self._data[addr] | mask if int(value) else self._data[addr] & ~mask
+
+    def update_parity(self):
+        data = self._data
+        if self.journal is not None:
+            self.journal += (208, data[208])
+        data[208] = data[208] & 0b11111110 | PARITY_FLAGS[data[224]]
+        self.parity_stale = False
+
+    def read_bit(self, bit: int):
+        addr, mask = BIT_ADDRESSES[bit]
+        return 1 if self._data[addr] & mask else 0
+
+    def write_bit(self, bit: int, value: Union[int, bool]):
+        addr, mask = BIT_ADDRESSES[bit]
+        self._set_bit(addr, mask, value)
+
+    def __bytes__(self):
+        return bytes(self._data)
+
+    def copy(self):
+        mem = InternalDataMemory()
+        mem.restore(bytes(self))
+        mem.latches = self.latches
+        return mem
+
+    def restore(self, data: bytes):
+        # Overwrite all 256 bytes in place, so the views stay valid
+        self._data[:] = data
+        self.refresh()
+
+    def refresh(self):
+        # Recompute what is derived from the contents after they were changed bypassing __setitem__
+        self.bank_base = self._data[208] & 0b00011000
+        self.parity_stale = True
+        self._update_pending_interrupts()
+
+    @property
+    def latches(self):
+        # Previous states of T0, T1, INT0 and INT1 in bits 0-3
+        return (self.t0_previous_state | self.t1_previous_state << 1
+                | self.int0_previous_state << 2 | self.int1_previous_state << 3)
+
+    @latches.setter
+    def latches(self, value: int):
+        self.t0_previous_state = value & 1
+        self.t1_previous_state = value >> 1 & 1
+        self.int0_previous_state = value >> 2 & 1
+        self.int1_previous_state = value >> 3 & 1
+
+    def _update_pending_interrupts(self):
+        # Bits 0-3: requests enabled in IE, in the order of EX0, ET0, EX1, ET1 (0 if EA is clear)
+        # Bits 4-5: INT0/INT1 pins low, so IE0/IE1 may be set on the next cycle
+        data = self._data
+        tcon = data[136]
+        ie = data[168]
+        requests = tcon >> 1 & 0b0101 | tcon >> 4 & 0b1010
+        pending = requests & ie if ie & 0b10000000 else 0
+        self.pending_interrupts = pending | (~data[176] & 0b1100) << 2
 
     @property
     def dptr(self):
@@ -1362,523 +1935,161 @@ class InternalDataMemory:
 
     @dptr.setter
     def dptr(self, value: Union[int, 'Byte', 'DoubleByte']):
-        self._dptr.value = value
-        self[130].value = int(f'{int(value):016b}'[:8], 2)
-        self[131].value = int(f'{int(value):016b}'[8:], 2)
-
-    @property
-    def tcon(self):
-        return self[136]
-
-    @tcon.setter
-    def tcon(self, value):
-        self[136].value = value
-
-    @property
-    def tf1(self):
-        return self.tcon[0]
-
-    @tf1.setter
-    def tf1(self, value):
-        self.tcon[0] = value
-
-    @property
-    def tr1(self):
-        return self.tcon[1]
-
-    @tr1.setter
-    def tr1(self, value):
-        self.tcon[1] = value
-
-    @property
-    def tf0(self):
-        return self.tcon[2]
-
-    @tf0.setter
-    def tf0(self, value):
-        self.tcon[2] = value
-
-    @property
-    def tr0(self):
-        return self.tcon[3]
-
-    @tr0.setter
-    def tr0(self, value):
-        self.tcon[3] = value
-
-    @property
-    def ie1(self):
-        return self.tcon[4]
-
-    @ie1.setter
-    def ie1(self, value):
-        self.tcon[4] = value
-
-    @property
-    def it1(self):
-        return self.tcon[5]
-
-    @it1.setter
-    def it1(self, value):
-        self.tcon[5] = value
-
-    @property
-    def ie0(self):
-        return self.tcon[6]
-
-    @ie0.setter
-    def ie0(self, value):
-        self.tcon[6] = value
-
-    @property
-    def it0(self):
-        return self.tcon[7]
+        value = int(value) % 65536
+        self[130] = value >> 8
+        self[131] = value & 255
 
-    @it0.setter
-    def it0(self, value):
-        self.tcon[7] = value
-
-    @property
-    def tmod(self):
-        return self[137]
-
-    @tmod.setter
-    def tmod(self, value):
-        self[137].value = value
-
-    @property
-    def t1_gate(self):
-        return self.tmod[0]
-
-    @t1_gate.setter
-    def t1_gate(self, value):
-        self.tmod[0] = value
-
-    @property
-    def t1_ct(self):
-        return self.tmod[1]
-
-    @t1_ct.setter
-    def t1_ct(self, value):
-        self.tmod[1] = value
-
-    @property
-    def t1_m1(self):
-        return self.tmod[2]
-
-    @t1_m1.setter
-    def t1_m1(self, value):
-        self.tmod[2] = value
-
-    @property
-    def t1_m0(self):
-        return self.tmod[3]
-
-    @t1_m0.setter
-    def t1_m0(self, value):
-        self.tmod[3] = value
+    def read_dptr(self):
+        data = self._data
+        return data[130] << 8 | data[131]
 
     @property
     def t1_mode(self):
-        return 2 * self.t1_m1 + self.t1_m0
-
-    @property
-    def t0_gate(self):
-        return self.tmod[4]
-
-    @t0_gate.setter
-    def t0_gate(self, value):
-        self.tmod[4] = value
-
-    @property
-    def t0_ct(self):
-        return self.tmod[5]
-
-    @t0_ct.setter
-    def t0_ct(self, value):
-        self.tmod[5] = value
-
-    @property
-    def t0_m1(self):
-        return self.tmod[6]
-
-    @t0_m1.setter
-    def t0_m1(self, value):
-        self.tmod[6] = value
-
-    @property
-    def t0_m0(self):
-        return self.tmod[7]
-
-    @t0_m0.setter
-    def t0_m0(self, value):
-        self.tmod[7] = value
+        return self._data[137] >> 4 & 0b11
 
     @property
     def t0_mode(self):
-        return 2 * self.t0_m1 + self.t0_m0
-
-    @property
-    def tl0(self):
-        return self[138]
-
-    @tl0.setter
-    def tl0(self, value):
-        self[138].value = value
-
-    @property
-    def tl1(self):
-        return self[139]
-
-    @tl1.setter
-    def tl1(self, value):
-        self[139].value = value
-
-    @property
-    def th0(self):
-        return self[140]
-
-    @th0.setter
-    def th0(self, value):
-        self[140].value = value
-
-    @property
-    def th1(self):
-        return self[141]
-
-    @th1.setter
-    def th1(self, value):
-        self[141].value = value
-
-    @property
-    def p1(self):
-        return self[144]
-
-    @p1.setter
-    def p1(self, value):
-        self[144].value = value
-
-    @property
-    def p2(self):
-        return self[160]
-
-    @p2.setter
-    def p2(self, value):
-        self[160].value = value
-
-    @property
-    def ie(self):
-        return self[168]
-
-    @ie.setter
-    def ie(self, value):
-        self[168].value = value
-
-    @property
-    def ea(self):
-        return self.ie[0]
-
-    @ea.setter
-    def ea(self, value):
-        self.ie[0] = value
-
-    @property
-    def es(self):
-        return self.ie[3]
-
-    @es.setter
-    def es(self, value):
-        self.ie[3] = value
-
-    @property
-    def et1(self):
-        return self.ie[4]
-
-    @et1.setter
-    def et1(self, value):
-        self.ie[4] = value
-
-    @property
-    def ex1(self):
-        return self.ie[5]
-
-    @ex1.setter
-    def ex1(self, value):
-        self.ie[5] = value
-
-    @property
-    def et0(self):
-        return self.ie[6]
-
-    @et0.setter
-    def et0(self, value):
-        self.ie[6] = value
-
-    @property
-    def ex0(self):
-        return self.ie[7]
-
-    @ex0.setter
-    def ex0(self, value):
-        self.ie[7] = value
-
-    @property
-    def p3(self):
-        return self[176]
-
-    @p3.setter
-    def p3(self, value):
-        self[176].value = value
-
-    @property
-    def t1(self):
-        return self.p3[2]
-
-    @t1.setter
-    def t1(self, value):
-        self.p3[2] = value
-
-    @property
-    def t0(self):
-        return self.p3[3]
-
-    @t0.setter
-    def t0(self, value):
-        self.p3[3] = value
-
-    @property
-    def int1(self):
-        return self.p3[4]
-
-    @int1.setter
-    def int1(self, value):
-        self.p3[4] = value
-
-    @property
-    def int0(self):
-        return self.p3[5]
-
-    @int0.setter
-    def int0(self, value):
-        self.p3[5] = value
-
-    @property
-    def ip(self):
-        return self[184]
-
-    @ip.setter
-    def ip(self, value):
-        self[184].value = value
-
-    @property
-    def ps(self):
-        return self.ip[3]
-
-    @ps.setter
-    def ps(self, value):
-        self.ip[3] = value
-
-    @property
-    def pt1(self):
-        return self.ip[4]
-
-    @pt1.setter
-    def pt1(self, value):
-        self.ip[4] = value
-
-    @property
-    def px1(self):
-        return self.ip[5]
-
-    @px1.setter
-    def px1(self, value):
-        self.ip[5] = value
-
-    @property
-    def pt0(self):
-        return self.ip[6]
-
-    @pt0.setter
-    def pt0(self, value):
-        self.ip[6] = value
-
-    @property
-    def px0(self):
-        return self.ip[7]
-
-    @px0.setter
-    def px0(self, value):
-        self.ip[7] = value
-
-    @property
-    def a(self):
-        return self[224]
-
-    @a.setter
-    def a(self, value):
-        self[224].value = value
-
-    @property
-    def b(self):
-        return self[240]
-
-    @b.setter
-    def b(self, value):
-        self[240].value = value
-
-    @property
-    def psw(self):
-        return self[208]
-
-    @property
-    def c(self):
-        return self.psw[0]
-
-    @c.setter
-    def c(self, value):
-        self.psw[0] = value
-
-    @property
-    def ac(self):
-        return self.psw[1]
-
-    @ac.setter
-    def ac(self, value):
-        self.psw[1] = value
-
-    @property
-    def f0(self):
-        return self.psw[2]
-
-    @f0.setter
-    def f0(self, value):
-        self.psw[2] = value
-
-    @property
-    def rs1(self):
-        return self.psw[3]
-
-    @rs1.setter
-    def rs1(self, value):
-        self.psw[3] = value
-
-    @property
-    def rs0(self):
-        return self.psw[4]
-
-    @rs0.setter
-    def rs0(self, value):
-        self.psw[4] = value
-
-    @property
-    def ov(self):
-        return self.psw[5]
-
-    @ov.setter
-    def ov(self, value):
-        self.psw[5] = value
-
-    @property
-    def f1(self):
-        return self.psw[6]
-
-    @f1.setter
-    def f1(self, value):
-        self.psw[6] = value
-
-    @property
-    def p(self):
-        return self.psw[7]
-
-    @p.setter
-    def p(self, value):
-        self.psw[7] = value
+        return self._data[137] & 0b11
 
     @property
     def selected_register_bank(self):
-        return 2 * self.rs1 + self.rs0
+        return self.bank_base >> 3
 
     @selected_register_bank.setter
     def selected_register_bank(self, value: int):
-        self.rs1, self.rs0 = [int(bit) for bit in f'{value:02b}']
-
-    @property
-    def r0(self):
-        return self[8 * self.selected_register_bank]
+        self[208] = self.read(208) & 0b11100111 | value << 3
 
-    @r0.setter
-    def r0(self, value):
-        self[8 * self.selected_register_bank].value = value
+    def flags(self, *sfrs: str):
+        # Values of the named bits of the given SFRs, or of all SFRs
+        data = self._data
+        return {name: 1 if data[SFR_ADDRESSES[sfr]] & 0b10000000 >> bit_number else 0
+                for name, (sfr, bit_number) in SFR_BITS.items() if not sfrs or sfr in sfrs}
 
-    @property
-    def r1(self):
-        return self[8 * self.selected_register_bank + 1]
 
-    @r1.setter
-    def r1(self, value):
-        self[8 * self.selected_register_bank + 1].value = value
+def _sfr_property(addr: int):
+    def getter(self):
+        return self[addr]
 
-    @property
-    def r2(self):
-        return self[8 * self.selected_register_bank + 2]
+    def setter(self, value):
+        self[addr] = value
 
-    @r2.setter
-    def r2(self, value):
-        self[8 * self.selected_register_bank + 2].value = value
+    return property(getter, setter)
 
-    @property
-    def r3(self):
-        return self[8 * self.selected_register_bank + 3]
 
-    @r3.setter
-    def r3(self, value):
-        self[8 * self.selected_register_bank + 3].value = value
+def _bit_property(addr: int, mask: int):
+    def getter(self):
+        return 1 if self._data[addr] & mask else 0
 
-    @property
-    def r4(self):
-        return self[8 * self.selected_register_bank + 4]
+    def setter(self, value):
+        self._set_bit(addr, mask, value)
 
-    @r4.setter
-    def r4(self, value):
-        self[8 * self.selected_register_bank + 4].value = value
+    return property(getter, setter)
 
-    @property
-    def r5(self):
-        return self[8 * self.selected_register_bank + 5]
 
-    @r5.setter
-    def r5(self, value):
-        self[8 * self.selected_register_bank + 5].value = value
+def _register_property(number: int):
+    def getter(self):
+        return self[self.bank_base + number]
 
-    @property
-    def r6(self):
-        return self[8 * self.selected_register_bank + 6]
+    def setter(self, value):
+        self[self.bank_base + number] = value
 
-    @r6.setter
-    def r6(self, value):
-        self[8 * self.selected_register_bank + 6].value = value
+    return property(getter, setter)
 
-    @property
-    def r7(self):
-        return self[8 * self.selected_register_bank + 7]
 
-    @r7.setter
-    def r7(self, value):
-        self[8 * self.selected_register_bank + 7].value = value
+for _name, _addr in SFR_ADDRESSES.items():
+    setattr(InternalDataMemory, _name, _sfr_property(_addr))
+for _name, (_sfr, _bit_number) in SFR_BITS.items():
+    setattr(InternalDataMemory, _name, _bit_property(SFR_ADDRESSES[_sfr], 0b10000000 >> _bit_number))
+for _number in range(8):
+    setattr(InternalDataMemory, f'r{_number}', _register_property(_number))
 
 
 class ExternalDataMemory:
+    # CSKB0, CSKB1, CSDS and CSDB
+    _device_registers = frozenset((65313, 65314, 65328, 65336))
+    _zero_page = bytes(256)
+
     def __init__(self):
-        self._data = [Byte() for _ in range(65536)]  # 64 KiB
+        # 64 KiB in 256-byte pages, allocated on the first write to them
+        self._pages = [None] * 256
+        # Whether a page belongs to this memory only; shared pages are copied on write
+        self._owned = bytearray(256)
+        # Byte views of the device registers, created on first access; other views aren't kept
+        self._views = {}
+        # List getting (address + 256, previous value) of every write while time travel is enabled
+        self.journal = None
 
     def __getitem__(self, addr: Union[int, 'DoubleByte']):
-        return self._data[int(addr)]
+        addr = int(addr)
+        view = self._views.get(addr)
+        if view is None:
+            if not 0 <= addr < 65536:
+                raise IndexError('external data memory address out of range')
+            view = ByteView(self, addr)
+            if addr in self._device_registers:
+                self._views[addr] = view
+        return view
 
     def __len__(self):
-        return len(self._data)
+        return 65536
 
-    def __setitem__(self, addr, value: 'Byte'):
-        self[addr].value = value
+    def __setitem__(self, addr, value: Union[int, 'Byte']):
+        addr = int(addr)
+        number = addr >> 8
+        if self.journal is not None:
+            self.journal += (addr + 256, self.read(addr))
+        if not self._owned[number]:
+            page = self._pages[number]
+            self._pages[number] = bytearray(256) if page is None else bytearray(page)
+            self._owned[number] = 1
+        self._pages[number][addr & 255] = int(value) % 256
+
+    def __iter__(self):
+        for page in self._pages:
+            if page is None:
+                yield from bytes(256)
+            else:
+                yield from page
+
+    def read(self, addr: int):
+        page = self._pages[addr >> 8]
+        return 0 if page is None else page[addr & 255]
+
+    def snapshot(self):
+        # Bitmap of the non-zero pages followed by their contents, so equal memories give equal
+        # snapshots however their pages were allocated
+        bitmap = bytearray(32)
+        pages = []
+        for number, page in enumerate(self._pages):
+            if page is not None and page != self._zero_page:
+                bitmap[number >> 3] |= 1 << (number & 7)
+                pages.append(page)
+        return bytes(bitmap) + b''.join(pages)
+
+    def restore(self, snapshot: bytes):
+        page_count = sum(bin(byte).count('1') for byte in snapshot[:32])
+        if len(snapshot) < 32 or len(snapshot) != 32 + page_count * 256:
+            raise ValueError('Truncated or corrupted XRAM snapshot')
+        pages = [None] * 256
+        offset = 32
+        for number in range(256):
+            if snapshot[number >> 3] >> (number & 7) & 1:
+                pages[number] = bytearray(snapshot[offset:offset + 256])
+                offset += 256
+        self._pages = pages
+        self._owned = bytearray(page is not None for page in pages)
+
+    def fork(self):
+        # A copy sharing all pages with this memory, until either of them writes to one
+        xmem = ExternalDataMemory()
+        xmem.share_pages(self)
+        return xmem
+
+    def share_pages(self, other: 'ExternalDataMemory'):
+        # Take over the contents of another memory without copying them
+        self._pages = list(other._pages)
+        self._owned = bytearray(256)
+        other._owned = bytearray(256)
 
     @property
     def cskb0(self):
@@ -1886,7 +2097,7 @@ class ExternalDataMemory:
 
     @cskb0.setter
     def cskb0(self, value):
-        self[65313].value = value
+        self[65313] = value
 
     @property
     def cskb1(self):
@@ -1894,7 +2105,7 @@ class ExternalDataMemory:
 
     @cskb1.setter
     def cskb1(self, value):
-        self[65314].value = value
+        self[65314] = value
 
     @property
     def csds(self):
@@ -1902,7 +2113,7 @@ class ExternalDataMemory:
 
     @csds.setter
     def csds(self, value):
-        self[65328].value = value
+        self[65328] = value
 
     @property
     def csdb(self):
@@ -1910,21 +2121,27 @@ class ExternalDataMemory:
 
     @csdb.setter
     def csdb(self, value):
-        self[65336].value = value
+        self[65336] = value
 
 
 class Byte:
     # Warning: big-endian
+    __slots__ = ('value',)
+    _width = 8
+
     def __init__(self, value=0):
         self.value = value
 
     def __getitem__(self, bit_number: int):
-        return int(self.bits[bit_number])
+        if bit_number < 0:
+            bit_number += self._width
+        return self.value >> self._width - 1 - bit_number & 1
 
     def __setitem__(self, bit_number: int, bit_value: Union[int, bool]):
-        bits = self.bits
-        bits = bits[:bit_number] + str(int(bit_value)) + bits[bit_number + 1:]
-        self.value = int(bits, 2)
+        if bit_number < 0:
+            bit_number += self._width
+        mask = 1 << self._width - 1 - bit_number
+        self.value = self.value | mask if int(bit_value) else self.value & ~mask
 
     def __setattr__(self, name, value: Union[int, 'Byte']):
         super().__setattr__(name, int(value) % 256)
@@ -1985,13 +2202,45 @@ class Byte:
         return f'{self:08b}'
 
     def rotate_left(self):
-        self.value = int(self.bits[1:] + self.bits[0], 2)
+        value = self.value
+        self.value = value << 1 | value >> self._width - 1
 
     def rotate_right(self):
-        self.value = int(self.bits[-1] + self.bits[:-1], 2)
+        value = self.value
+        self.value = value >> 1 | (value & 1) << self._width - 1
+
+
+class ByteView(Byte):
+    # A Byte reading and writing its value in the memory it belongs to
+    __slots__ = ('_memory', '_addr')
+
+    def __init__(self, memory, addr: int):
+        object.__setattr__(self, '_memory', memory)
+        object.__setattr__(self, '_addr', addr)
+
+    @property
+    def value(self):
+        return self._memory.read(self._addr)
+
+    @value.setter
+    def value(self, value: int):
+        self._memory[self._addr] = value
+
+    # Results of arithmetic are not tied to the memory
+    def __add__(self, other: Union[int, 'Byte']):
+        return Byte(int(self) + int(other))
+
+    def __sub__(self, other: Union[int, 'Byte']):
+        return Byte(int(self) - int(other))
+
+    def __rsub__(self, other: int):
+        return Byte(other - int(self))
 
 
 class DoubleByte(Byte):
+    __slots__ = ()
+    _width = 16
+
     def __init__(self, value=0):
         super().__init__(value)
 
@@ -2003,10 +2252,127 @@ class DoubleByte(Byte):
         return f'{self:016b}'
 
 
-class Timer0:
+class DoubleByteView(DoubleByte):
+    # A DoubleByte stored big-endian in two consecutive addresses of a memory
+    __slots__ = ('_memory', '_addr')
+
+    def __init__(self, memory, addr: int):
+        object.__setattr__(self, '_memory', memory)
+        object.__setattr__(self, '_addr', addr)
+
+    @property
+    def value(self):
+        return self._memory.read(self._addr) << 8 | self._memory.read(self._addr + 1)
+
+    @value.setter
+    def value(self, value: int):
+        self._memory[self._addr] = value >> 8
+        self._memory[self._addr + 1] = value & 255
+
+    # Results of arithmetic are not tied to the memory
+    def __add__(self, other: Union[int, 'Byte']):
+        return DoubleByte(int(self) + int(other))
+
+    def __sub__(self, other: Union[int, 'Byte']):
+        return DoubleByte(int(self) - int(other))
+
+    def __rsub__(self, other: int):
+        return DoubleByte(other - int(self))
+
+
+class Timer:
+    # Addresses of the TLx and THx registers, position of the timer's mode bits in TMOD
+    # and mask of TFx in TCON
+    _tl = None
+    _th = None
+    _tmod_shift = None
+    _tf_mask = None
+
     def __init__(self, mc: 'Microcontroller'):
         self._mc = mc
 
+    @property
+    def _mode(self):
+        return self._mc.mem.read(137) >> self._tmod_shift & 0b11
+
+    def increments_to_overflow(self):
+        # Number of increments after which TFx would be set, or None if they never set it
+        mode = self._mode
+        tl = int(self._mc.mem[self._tl])
+        th = int(self._mc.mem[self._th])
+        if mode == 0:
+            # TLx counts up to 31, unless it was set above that and has to wrap around first
+            return 256 - tl + 8192 - th * 32 if tl > 31 else 8192 - th * 32 - tl
+        elif mode == 1:
+            return 65536 - th * 256 - tl
+        # Modes 2 and 3 overflow TLx alone
+        return 256 - tl
+
+    def advance(self, n: int):
+        # Same as n increments, in constant time; return the number of overflows
+        mode = self._mode
+        mem = self._mc.mem
+        tl = int(mem[self._tl])
+        th = int(mem[self._th])
+        if mode == 1:
+            overflows, count = divmod(th * 256 + tl + n, 65536)
+            th, tl = divmod(count, 256)
+        elif mode == 0:
+            to_overflow = self.increments_to_overflow()
+            if n < to_overflow:
+                overflows = 0
+                if tl > 31:
+                    if n < 256 - tl:
+                        mem[self._tl] = tl + n
+                        return 0
+                    n -= 256 - tl
+                    tl = 0
+                count = th * 32 + tl + n
+            else:
+                # Counting continues from 0 after the first overflow
+                overflows, count = divmod(n - to_overflow, 8192)
+                overflows += 1
+            th, tl = divmod(count, 32)
+        elif mode == 2:
+            to_overflow = 256 - tl
+            if n < to_overflow:
+                overflows = 0
+                tl += n
+            else:
+                # TLx is reloaded from THx on every overflow
+                overflows, count = divmod(n - to_overflow, 256 - th)
+                overflows += 1
+                tl = th + count
+        else:
+            overflows, tl = divmod(tl + n, 256)
+
+        mem[self._th] = th
+        mem[self._tl] = tl
+        if overflows:
+            mem._set_bit(136, self._tf_mask, 1)
+        return overflows
+
+
+class Timer0(Timer):
+    _tl = 138
+    _th = 140
+    _tmod_shift = 0
+    _tf_mask = 0b00100000
+
+    def increments_to_overflow(self, mode3_th0_only=False):
+        if mode3_th0_only:
+            return 256 - int(self._mc.mem.th0)
+        return super().increments_to_overflow()
+
+    def advance(self, n: int, mode3_th0_only=False):
+        if not mode3_th0_only:
+            return super().advance(n)
+        overflows, th0 = divmod(int(self._mc.mem.th0) + n, 256)
+        self._mc.mem.th0 = th0
+        if overflows:
+            self._mc.mem.tf1 = 1
+        return overflows
+
     def increment(self, mode3_th0_only=False):
         if mode3_th0_only:
             if self._mc.mem.th0 == 255:
@@ -2053,9 +2419,18 @@ class Timer0:
                 self._mc.mem.tl0 += 1
 
 
-class Timer1:
-    def __init__(self, mc: 'Microcontroller'):
-        self._mc = mc
+class Timer1(Timer):
+    _tl = 139
+    _th = 141
+    _tmod_shift = 4
+    _tf_mask = 0b10000000
+
+    def increments_to_overflow(self):
+        # Timer 1 holds its count in mode 3
+        return None if self._mode == 3 else super().increments_to_overflow()
+
+    def advance(self, n: int):
+        return 0 if self._mode == 3 else super().advance(n)
 
     def increment(self):
         if self._mc.mem.t1_mode == 0:
@@ -2091,11 +2466,11 @@ class Timer1:
 class Operation:
     _opcodes = {
         0: {'bytes': 1, 'cycles': 1, 'mnemonic': 'NOP'},
-        1: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        2: {'bytes': 3, 'cycles': 2, 'mnemonic': 'LJMP {:X}h'},
+        1: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        2: {'bytes': 3, 'cycles': 2, 'mnemonic': 'LJMP {:X}h', 'operands': ('high_order_byte', 'low_order_byte')},
         3: {'bytes': 1, 'cycles': 1, 'mnemonic': 'RR A'},
         4: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC A'},
-        5: {'bytes': 2, 'cycles': 1, 'mnemonic': 'INC {:X}h'},
+        5: {'bytes': 2, 'cycles': 1, 'mnemonic': 'INC {:X}h', 'operands': ('direct',)},
         6: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC @R0'},
         7: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC @R1'},
         8: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC R0'},
@@ -2106,12 +2481,12 @@ class Operation:
         13: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC R5'},
         14: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC R6'},
         15: {'bytes': 1, 'cycles': 1, 'mnemonic': 'INC R7'},
-        16: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JBC {:X}h, {:X}h'},
-        17: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        18: {'bytes': 3, 'cycles': 2, 'mnemonic': 'LCALL {:X}h'},
+        16: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JBC {:X}h, {:X}h', 'operands': ('bit', 'offset')},
+        17: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        18: {'bytes': 3, 'cycles': 2, 'mnemonic': 'LCALL {:X}h', 'operands': ('high_order_byte', 'low_order_byte')},
         19: {'bytes': 1, 'cycles': 1, 'mnemonic': 'RRC A'},
         20: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC A'},
-        21: {'bytes': 2, 'cycles': 1, 'mnemonic': 'DEC {:X}h'},
+        21: {'bytes': 2, 'cycles': 1, 'mnemonic': 'DEC {:X}h', 'operands': ('direct',)},
         22: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC @R0'},
         23: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC @R1'},
         24: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC R0'},
@@ -2122,12 +2497,12 @@ class Operation:
         29: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC R5'},
         30: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC R6'},
         31: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DEC R7'},
-        32: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JB {:X}h, {:X}h'},
-        33: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
+        32: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JB {:X}h, {:X}h', 'operands': ('bit', 'offset')},
+        33: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
         34: {'bytes': 1, 'cycles': 2, 'mnemonic': 'RET'},
         35: {'bytes': 1, 'cycles': 1, 'mnemonic': 'RL A'},
-        36: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADD A, #{}'},
-        37: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADD A, {:X}h'},
+        36: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADD A, #{}', 'operands': ('immed',)},
+        37: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADD A, {:X}h', 'operands': ('direct',)},
         38: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, @R0'},
         39: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, @R1'},
         40: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, R0'},
@@ -2138,12 +2513,12 @@ class Operation:
         45: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, R5'},
         46: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, R6'},
         47: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADD A, R7'},
-        48: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JNB {:X}h, {:X}h'},
-        49: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
+        48: {'bytes': 3, 'cycles': 2, 'mnemonic': 'JNB {:X}h, {:X}h', 'operands': ('bit', 'offset')},
+        49: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
         50: {'bytes': 1, 'cycles': 2, 'mnemonic': 'RETI'},
         51: {'bytes': 1, 'cycles': 1, 'mnemonic': 'RLC A'},
-        52: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADDC A, #{}'},
-        53: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADDC A, {:X}h'},
+        52: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADDC A, #{}', 'operands': ('immed',)},
+        53: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ADDC A, {:X}h', 'operands': ('direct',)},
         54: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, @R0'},
         55: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, @R1'},
         56: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, R0'},
@@ -2154,12 +2529,12 @@ class Operation:
         61: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, R5'},
         62: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, R6'},
         63: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ADDC A, R7'},
-        64: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JC {:X}h'},
-        65: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        66: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL {:X}h, A'},
-        67: {'bytes': 3, 'cycles': 2, 'mnemonic': 'ORL {:X}h, #{}'},
-        68: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL A, #{}'},
-        69: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL A, {:X}h'},
+        64: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JC {:X}h', 'operands': ('offset',)},
+        65: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        66: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL {:X}h, A', 'operands': ('direct',)},
+        67: {'bytes': 3, 'cycles': 2, 'mnemonic': 'ORL {:X}h, #{}', 'operands': ('direct', 'immed')},
+        68: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL A, #{}', 'operands': ('immed',)},
+        69: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ORL A, {:X}h', 'operands': ('direct',)},
         70: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, @R0'},
         71: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, @R1'},
         72: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, R0'},
@@ -2170,12 +2545,12 @@ class Operation:
         77: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, R5'},
         78: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, R6'},
         79: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ORL A, R7'},
-        80: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JNC {:X}h'},
-        81: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        82: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL {:X}h, A'},
-        83: {'bytes': 3, 'cycles': 2, 'mnemonic': 'ANL {:X}h, #{}'},
-        84: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL A, #{}'},
-        85: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL A, {:X}h'},
+        80: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JNC {:X}h', 'operands': ('offset',)},
+        81: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        82: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL {:X}h, A', 'operands': ('direct',)},
+        83: {'bytes': 3, 'cycles': 2, 'mnemonic': 'ANL {:X}h, #{}', 'operands': ('direct', 'immed')},
+        84: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL A, #{}', 'operands': ('immed',)},
+        85: {'bytes': 2, 'cycles': 1, 'mnemonic': 'ANL A, {:X}h', 'operands': ('direct',)},
         86: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, @R0'},
         87: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, @R1'},
         88: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, R0'},
@@ -2186,12 +2561,12 @@ class Operation:
         93: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, R5'},
         94: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, R6'},
         95: {'bytes': 1, 'cycles': 1, 'mnemonic': 'ANL A, R7'},
-        96: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JZ {:X}h'},
-        97: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        98: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL {:X}h, A'},
-        99: {'bytes': 3, 'cycles': 2, 'mnemonic': 'XRL {:X}h, #{}'},
-        100: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL A, #{}'},
-        101: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL A, {:X}h'},
+        96: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JZ {:X}h', 'operands': ('offset',)},
+        97: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        98: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL {:X}h, A', 'operands': ('direct',)},
+        99: {'bytes': 3, 'cycles': 2, 'mnemonic': 'XRL {:X}h, #{}', 'operands': ('direct', 'immed')},
+        100: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL A, #{}', 'operands': ('immed',)},
+        101: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XRL A, {:X}h', 'operands': ('direct',)},
         102: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, @R0'},
         103: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, @R1'},
         104: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, R0'},
@@ -2202,44 +2577,44 @@ class Operation:
         109: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, R5'},
         110: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, R6'},
         111: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XRL A, R7'},
-        112: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JNZ {:X}h'},
-        113: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        114: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ORL C, {:X}h'},
+        112: {'bytes': 2, 'cycles': 2, 'mnemonic': 'JNZ {:X}h', 'operands': ('offset',)},
+        113: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        114: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ORL C, {:X}h', 'operands': ('bit',)},
         115: {'bytes': 1, 'cycles': 2, 'mnemonic': 'JMP @A+DPTR'},
-        116: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV A, #{}'},
-        117: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV {:X}h, #{}'},
-        118: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R0, #{}'},
-        119: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R1, #{}'},
-        120: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R0, #{}'},
-        121: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R1, #{}'},
-        122: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R2, #{}'},
-        123: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R3, #{}'},
-        124: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R4, #{}'},
-        125: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R5, #{}'},
-        126: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R6, #{}'},
-        127: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R7, #{}'},
-        128: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SJMP {:X}h'},
-        129: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        130: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ANL C, {:X}h'},
+        116: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV A, #{}', 'operands': ('immed',)},
+        117: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV {:X}h, #{}', 'operands': ('direct', 'immed')},
+        118: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R0, #{}', 'operands': ('immed',)},
+        119: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R1, #{}', 'operands': ('immed',)},
+        120: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R0, #{}', 'operands': ('immed',)},
+        121: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R1, #{}', 'operands': ('immed',)},
+        122: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R2, #{}', 'operands': ('immed',)},
+        123: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R3, #{}', 'operands': ('immed',)},
+        124: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R4, #{}', 'operands': ('immed',)},
+        125: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R5, #{}', 'operands': ('immed',)},
+        126: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R6, #{}', 'operands': ('immed',)},
+        127: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV R7, #{}', 'operands': ('immed',)},
+        128: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SJMP {:X}h', 'operands': ('offset',)},
+        129: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        130: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ANL C, {:X}h', 'operands': ('bit',)},
         131: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVC A, @A+PC'},
         132: {'bytes': 1, 'cycles': 4, 'mnemonic': 'DIV AB'},
-        133: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV {:X}h, {:X}h'},
-        134: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, @R0'},
-        135: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, @R1'},
-        136: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R0'},
-        137: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R1'},
-        138: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R2'},
-        139: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R3'},
-        140: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R4'},
-        141: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R5'},
-        142: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R6'},
-        143: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R7'},
-        144: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV DPTR, #{}'},
-        145: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        146: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, C'},
+        133: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV {:X}h, {:X}h', 'operands': ('src_direct', 'dest_direct')},
+        134: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, @R0', 'operands': ('direct',)},
+        135: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, @R1', 'operands': ('direct',)},
+        136: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R0', 'operands': ('direct',)},
+        137: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R1', 'operands': ('direct',)},
+        138: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R2', 'operands': ('direct',)},
+        139: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R3', 'operands': ('direct',)},
+        140: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R4', 'operands': ('direct',)},
+        141: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R5', 'operands': ('direct',)},
+        142: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R6', 'operands': ('direct',)},
+        143: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, R7', 'operands': ('direct',)},
+        144: {'bytes': 3, 'cycles': 2, 'mnemonic': 'MOV DPTR, #{}', 'operands': ('high_order_byte', 'low_order_byte')},
+        145: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        146: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV {:X}h, C', 'operands': ('bit',)},
         147: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVC A, @A+DPTR'},
-        148: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SUBB A, #{}'},
-        149: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SUBB A, {:X}h'},
+        148: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SUBB A, #{}', 'operands': ('immed',)},
+        149: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SUBB A, {:X}h', 'operands': ('direct',)},
         150: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, @R0'},
         151: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, @R1'},
         152: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, R0'},
@@ -2250,44 +2625,44 @@ class Operation:
         157: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, R5'},
         158: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, R6'},
         159: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SUBB A, R7'},
-        160: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ORL C, /{:X}h'},
-        161: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        162: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV C, {:X}h'},
+        160: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ORL C, /{:X}h', 'operands': ('bit',)},
+        161: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        162: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV C, {:X}h', 'operands': ('bit',)},
         163: {'bytes': 1, 'cycles': 2, 'mnemonic': 'INC DPTR'},
         164: {'bytes': 1, 'cycles': 4, 'mnemonic': 'MUL AB'},
         165: {'bytes': None, 'cycles': None, 'mnemonic': None},
-        166: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R0, {:X}h'},
-        167: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R1, {:X}h'},
-        168: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R0, {:X}h'},
-        169: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R1, {:X}h'},
-        170: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R2, {:X}h'},
-        171: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R3, {:X}h'},
-        172: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R4, {:X}h'},
-        173: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R5, {:X}h'},
-        174: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R6, {:X}h'},
-        175: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R7, {:X}h'},
-        176: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ANL C, /{:X}h'},
-        177: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        178: {'bytes': 2, 'cycles': 1, 'mnemonic': 'CPL {:X}h'},
+        166: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R0, {:X}h', 'operands': ('direct',)},
+        167: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV @R1, {:X}h', 'operands': ('direct',)},
+        168: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R0, {:X}h', 'operands': ('direct',)},
+        169: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R1, {:X}h', 'operands': ('direct',)},
+        170: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R2, {:X}h', 'operands': ('direct',)},
+        171: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R3, {:X}h', 'operands': ('direct',)},
+        172: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R4, {:X}h', 'operands': ('direct',)},
+        173: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R5, {:X}h', 'operands': ('direct',)},
+        174: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R6, {:X}h', 'operands': ('direct',)},
+        175: {'bytes': 2, 'cycles': 2, 'mnemonic': 'MOV R7, {:X}h', 'operands': ('direct',)},
+        176: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ANL C, /{:X}h', 'operands': ('bit',)},
+        177: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        178: {'bytes': 2, 'cycles': 1, 'mnemonic': 'CPL {:X}h', 'operands': ('bit',)},
         179: {'bytes': 1, 'cycles': 1, 'mnemonic': 'CPL C'},
-        180: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE A, #{}, {:X}h'},
-        181: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE A, {:X}h, {:X}h'},
-        182: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE @R0, #{}, {:X}h'},
-        183: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE @R1, #{}, {:X}h'},
-        184: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R0, #{}, {:X}h'},
-        185: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R1, #{}, {:X}h'},
-        186: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R2, #{}, {:X}h'},
-        187: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R3, #{}, {:X}h'},
-        188: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R4, #{}, {:X}h'},
-        189: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R5, #{}, {:X}h'},
-        190: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R6, #{}, {:X}h'},
-        191: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R7, #{}, {:X}h'},
-        192: {'bytes': 2, 'cycles': 2, 'mnemonic': 'PUSH {:X}h'},
-        193: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
-        194: {'bytes': 2, 'cycles': 1, 'mnemonic': 'CLR {:X}h'},
+        180: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE A, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        181: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE A, {:X}h, {:X}h', 'operands': ('direct', 'offset')},
+        182: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE @R0, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        183: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE @R1, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        184: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R0, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        185: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R1, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        186: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R2, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        187: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R3, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        188: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R4, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        189: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R5, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        190: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R6, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        191: {'bytes': 3, 'cycles': 2, 'mnemonic': 'CJNE R7, #{}, {:X}h', 'operands': ('immed', 'offset')},
+        192: {'bytes': 2, 'cycles': 2, 'mnemonic': 'PUSH {:X}h', 'operands': ('direct',)},
+        193: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
+        194: {'bytes': 2, 'cycles': 1, 'mnemonic': 'CLR {:X}h', 'operands': ('bit',)},
         195: {'bytes': 1, 'cycles': 1, 'mnemonic': 'CLR C'},
         196: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SWAP A'},
-        197: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XCH A, {:X}h'},
+        197: {'bytes': 2, 'cycles': 1, 'mnemonic': 'XCH A, {:X}h', 'operands': ('direct',)},
         198: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, @R0'},
         199: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, @R1'},
         200: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, R0'},
@@ -2298,28 +2673,28 @@ class Operation:
         205: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, R5'},
         206: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, R6'},
         207: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCH A, R7'},
-        208: {'bytes': 2, 'cycles': 2, 'mnemonic': 'POP {:X}h'},
-        209: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
-        210: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SETB {:X}h'},
+        208: {'bytes': 2, 'cycles': 2, 'mnemonic': 'POP {:X}h', 'operands': ('direct',)},
+        209: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
+        210: {'bytes': 2, 'cycles': 1, 'mnemonic': 'SETB {:X}h', 'operands': ('bit',)},
         211: {'bytes': 1, 'cycles': 1, 'mnemonic': 'SETB C'},
         212: {'bytes': 1, 'cycles': 1, 'mnemonic': 'DA A'},
-        213: {'bytes': 3, 'cycles': 2, 'mnemonic': 'DJNZ {:X}h, {:X}h'},
+        213: {'bytes': 3, 'cycles': 2, 'mnemonic': 'DJNZ {:X}h, {:X}h', 'operands': ('direct', 'offset')},
         214: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCHD A, @R0'},
         215: {'bytes': 1, 'cycles': 1, 'mnemonic': 'XCHD A, @R1'},
-        216: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R0, {:X}h'},
-        217: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R1, {:X}h'},
-        218: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R2, {:X}h'},
-        219: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R3, {:X}h'},
-        220: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R4, {:X}h'},
-        221: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R5, {:X}h'},
-        222: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R6, {:X}h'},
-        223: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R7, {:X}h'},
+        216: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R0, {:X}h', 'operands': ('offset',)},
+        217: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R1, {:X}h', 'operands': ('offset',)},
+        218: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R2, {:X}h', 'operands': ('offset',)},
+        219: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R3, {:X}h', 'operands': ('offset',)},
+        220: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R4, {:X}h', 'operands': ('offset',)},
+        221: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R5, {:X}h', 'operands': ('offset',)},
+        222: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R6, {:X}h', 'operands': ('offset',)},
+        223: {'bytes': 2, 'cycles': 2, 'mnemonic': 'DJNZ R7, {:X}h', 'operands': ('offset',)},
         224: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX A, @DPTR'},
-        225: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h'},
+        225: {'bytes': 2, 'cycles': 2, 'mnemonic': 'AJMP {:X}h', 'operands': ('addr11',)},
         226: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX A, @R0'},
         227: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX A, @R1'},
         228: {'bytes': 1, 'cycles': 1, 'mnemonic': 'CLR A'},
-        229: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV A, {:X}h'},
+        229: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV A, {:X}h', 'operands': ('direct',)},
         230: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV A, @R0'},
         231: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV A, @R1'},
         232: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV A, R0'},
@@ -2331,11 +2706,11 @@ class Operation:
         238: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV A, R6'},
         239: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV A, R7'},
         240: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX @DPTR, A'},
-        241: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h'},
+        241: {'bytes': 2, 'cycles': 2, 'mnemonic': 'ACALL {:X}h', 'operands': ('addr11',)},
         242: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX @R0, A'},
         243: {'bytes': 1, 'cycles': 2, 'mnemonic': 'MOVX @R1, A'},
         244: {'bytes': 1, 'cycles': 1, 'mnemonic': 'CPL A'},
-        245: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV {:X}h, A'},
+        245: {'bytes': 2, 'cycles': 1, 'mnemonic': 'MOV {:X}h, A', 'operands': ('direct',)},
         246: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV @R0, A'},
         247: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV @R1, A'},
         248: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV R0, A'},
@@ -2348,19 +2723,67 @@ class Operation:
         255: {'bytes': 1, 'cycles': 1, 'mnemonic': 'MOV R7, A'}
     }
 
+    # (opcode, args) -> mnemonic with the args filled in
+    _mnemonics = {}
+    _max_mnemonics = 65536
+
     def __init__(self, opcode: int, *args: int):
         self.opcode = opcode
         self.args = args
-        self.cycles = Operation._opcodes[opcode]['cycles']
+
+    @property
+    def cycles(self):
+        return OPCODES[self.opcode].cycles
 
     def __len__(self):
-        return Operation._opcodes[self.opcode]['bytes']
+        return OPCODES[self.opcode].length
 
     def __str__(self):
-        # Turn two one-byte arguments (as stored in a .hex file) into one two-byte argument
-        # e.g. 0xAB = 171, 0xCD = 205; 171 * 16 ** 2 + 205 = 43981 = 0xABCD
-        args = [self.args[0] * 16 ** 2 + self.args[1]] if self.opcode in (2, 18, 144) else self.args
-        return Operation._opcodes[self.opcode]['mnemonic'].format(*args)
+        return Operation.mnemonic(self.opcode, self.args)
+
+    @staticmethod
+    def mnemonic(opcode: int, args):
+        key = (opcode, tuple(args))
+        mnemonic = Operation._mnemonics.get(key)
+        if mnemonic is None:
+            # Turn two one-byte arguments (as stored in a .hex file) into one two-byte argument
+            # e.g. 0xAB = 171, 0xCD = 205; 171 * 16 ** 2 + 205 = 43981 = 0xABCD
+            args = [args[0] * 16 ** 2 + args[1]] if opcode in (2, 18, 144) else args
+            mnemonic = OPCODES[opcode].mnemonic.format(*args)
+            if len(Operation._mnemonics) >= Operation._max_mnemonics:
+                Operation._mnemonics.clear()
+            Operation._mnemonics[key] = mnemonic
+        return mnemonic
+
+
+class OpcodeInfo:
+    # Immutable description of an opcode, shared by the emulator and the disassembler
+    __slots__ = ('opcode', 'length', 'cycles', 'mnemonic', 'name', 'operand_kinds', 'handler')
+
+    def __init__(self, opcode: int):
+        info = Operation._opcodes[opcode]
+        handler = getattr(Microcontroller, f'_exec_{opcode}')
+        for name, value in (
+                ('opcode', opcode),
+                ('length', info['bytes']),
+                ('cycles', info['cycles']),
+                ('mnemonic', info['mnemonic']),
+                # e.g. 'DJNZ'
+                ('name', info['mnemonic'].split()[0] if info['mnemonic'] else None),
+                # In the order of the handler's arguments, e.g. ('direct', 'offset') for DJNZ direct, rel
+                ('operand_kinds', info.get('operands', ())),
+                # Unbound, Microcontroller instances call their own (possibly replaced) handlers
+                ('handler', handler)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.opcode})'
+
+
+OPCODES = tuple(OpcodeInfo(opcode) for opcode in range(256))
 
 
 class Stack:
@@ -2375,3 +2798,43 @@ class Stack:
 
     def top(self):
         return self._data[-1]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class StopReason:
+    MAX_CYCLES = 'max_cycles'
+    UNTIL_PC = 'until_pc'
+    BREAKPOINT = 'breakpoint'
+    HALT = 'halt'
+
+    def __init__(self, reason: str, cycles: int, instructions: int, seconds=0.0, device_seconds=0.0):
+        self.reason = reason
+        self.cycles = cycles
+        self.instructions = instructions
+        # Wall-clock time the run took and the time it covered on the device
+        self.seconds = seconds
+        self.device_seconds = device_seconds
+
+    @property
+    def real_time_factor(self):
+        # Above 1 when the emulator is faster than the device
+        return self.device_seconds / self.seconds if self.seconds else float('inf')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.reason!r}, cycles={self.cycles}, instructions={self.instructions})'
+
+
+class LoadReport:
+    def __init__(self, records: int, byte_count: int, seconds: float):
+        self.records = records
+        self.byte_count = byte_count
+        self.seconds = seconds
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(records={self.records}, byte_count={self.byte_count}, '
+                f'seconds={self.seconds:.6f})')
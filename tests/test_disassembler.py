@@ -1,4 +1,9 @@
+import io
+
+import pytest
+
 import disassembler
+import mcu
 
 
 def test_disassemble():
@@ -18,22 +23,117 @@ def test_disassemble():
     assert test_output == correct_output
 
 
+def test_disassemble_rom():
+    rom = bytes([2, 1, 0, 165, 4]) + bytes(250) + bytes([116])
+    assert list(disassembler.disassemble_rom(rom, 0, 6)) == [
+        (0, 3, 2, (1, 0), 'LJMP 100h'),
+        (3, 1, 165, (), None),
+        (4, 1, 4, (), 'INC A'),
+        (5, 1, 0, (), 'NOP')]
+    assert list(disassembler.disassemble_rom(rom, 254))[-1] == (254, 1, 0, (), 'NOP'), 'Cut-off instruction yielded'
+
+
+class TestControlFlowGraph:
+    def make_rom(self):
+        rom = bytearray(65536)
+        rom[0:3] = bytes([2, 0, 48])  # LJMP 30h
+        rom[11:13] = bytes([15, 50])  # INC R7, RETI
+        rom[48:50] = bytes([17, 64])  # ACALL 40h
+        rom[50:52] = bytes([218, 254])  # DJNZ R2, $
+        rom[52:54] = bytes([128, 250])  # SJMP 30h
+        rom[64] = 34  # RET
+        return bytes(rom)
+
+    def test_blocks(self):
+        graph = disassembler.ControlFlowGraph(self.make_rom())
+        assert sorted(graph.blocks) == [0, 3, 11, 19, 27, 48, 50, 52, 64]
+        assert graph.blocks[0].successors == (48,)
+        assert [i[4] for i in graph.blocks[11].instructions] == ['INC R7', 'RETI']
+        assert graph.blocks[48].successors == (50,) and graph.blocks[48].end == 50
+        assert graph.blocks[50].successors == (50, 52)
+        assert graph.blocks[52].successors == (48,)
+        assert graph.blocks[64].successors == ()
+
+    def test_labels(self):
+        graph = disassembler.ControlFlowGraph(self.make_rom())
+        assert graph.labels[0] == 'RESET' and graph.labels[11] == 'TIMER0'
+        assert graph.labels[48] == 'L_0030' and graph.labels[64] == 'SUB_0040'
+
+    def test_jump_table(self):
+        rom = bytearray(65536)
+        rom[0:3] = bytes([2, 0, 48])  # LJMP 30h
+        rom[48:51] = bytes([144, 1, 0])  # MOV DPTR, #100h
+        rom[51] = 115  # JMP @A+DPTR
+        rom[256:260] = bytes([1, 16, 1, 32])  # AJMP 10h, AJMP 20h
+        graph = disassembler.ControlFlowGraph(bytes(rom))
+        assert graph.blocks[48].successors == (256, 258)
+        assert graph.blocks[256].successors == (16,)
+
+    def test_control_flow_graph__cached(self):
+        m = mcu.Microcontroller()
+        m.load_binary(self.make_rom())
+        graph = disassembler.control_flow_graph(m.rom)
+        assert disassembler.control_flow_graph(self.make_rom()) is graph
+        m.rom[1] = 1
+        assert disassembler.control_flow_graph(m.rom) is not graph
+        assert isinstance(m.rom._data, bytearray), 'ROM frozen'
+
+
 class TestIntelHexFile:
     def test_loading_a_file(self):
         file_content = ':03000000020100FA\n:10010000AE00783879307420F37400F2C29674200F\n:00000001FF\n'
         i = disassembler.IntelHexFile(file_content)
         assert i._records[0].first_byte_addr == 0
-        assert i._records[0]._data == '020100'
+        assert i._records[0].data == bytes.fromhex('020100')
         assert i._records[1].first_byte_addr == 256
-        assert i._records[1]._data == 'AE00783879307420F37400F2C2967420'
+        assert i._records[1].data == bytes.fromhex('AE00783879307420F37400F2C2967420')
+
+    def test_loading_bytes_and_file_objects(self):
+        file_content = ':03000000020100FA\r\n:00000001FF\r\n'
+        for source in (file_content.encode(), io.StringIO(file_content), io.BytesIO(file_content.encode())):
+            i = disassembler.IntelHexFile(source)
+            assert len(i) == 1 and list(i._records[0]) == [2, 1, 0]
+
+    def test_loading_a_path(self, tmp_path):
+        path = tmp_path / 'test.hex'
+        path.write_text(':03000000020100FA\n:00000001FF\n')
+        assert len(disassembler.IntelHexFile(path)) == 1
+        with pytest.raises(ValueError):
+            disassembler.IntelHexFile(str(path))
+
+    def test_not_a_path(self):
+        with pytest.raises(ValueError):
+            disassembler.IntelHexFile('\ufeff:03000000020100FA\n:00000001FF\n')
+        with pytest.raises(ValueError):
+            disassembler.IntelHexFile('; comment\n:00000001FF\n')
+
+    def test_extended_addresses(self):
+        file_content = (':020000021000EC\n'  # Segment 1000h
+                        ':0100000001FE\n'
+                        ':020000040001F9\n'  # Upper 16 bits 0001h
+                        ':0100100002ED\n'
+                        ':0400000500000100F6\n'  # Start at 100h
+                        ':00000001FF\n'
+                        ':0100000003FC\n')  # After EOF
+        i = disassembler.IntelHexFile(file_content)
+        assert [r.first_byte_addr for r in i] == [65536, 65552]
+        assert i.start_addr == 256
 
 
 class TestRecord:
     def test__init__(self):
         r = disassembler.Record(':10010000AE00783879307420F37400F2C29674200F')
         assert r.first_byte_addr == 256
-        assert r._data == 'AE00783879307420F37400F2C2967420'
+        assert r.data == bytes.fromhex('AE00783879307420F37400F2C2967420')
 
     def test__iter__(self):
         r = disassembler.Record(':10010000AE00783879307420F37400F2C29674200F')
         assert list(r) == [174, 0, 120, 56, 121, 48, 116, 32, 243, 116, 0, 242, 194, 150, 116, 32]
+
+    def test_checksum(self):
+        with pytest.raises(ValueError):
+            disassembler.Record(':10010000AE00783879307420F37400F2C29674200E')
+
+    def test_length(self):
+        with pytest.raises(ValueError):
+            disassembler.Record(':10010000AE0078387930')
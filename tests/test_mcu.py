@@ -1,3 +1,5 @@
+import pytest
+
 import mcu
 
 
@@ -10,6 +12,158 @@ class TestMicrocontroller:
         assert m.rom[1] == 1, 'Second byte not loaded'
         assert m.rom[256] == 174, 'Misplaced byte - addr change due to ORG statement ignored'
 
+    def test_load_hex_file__report(self):
+        m = mcu.Microcontroller()
+        with open('test.hex', 'rb') as f:
+            report = m.load_hex_file(f)
+        assert report.records == 2 and report.byte_count == 19 and report.seconds >= 0
+        assert m.rom[256] == 174
+
+    def test_load_hex_file__out_of_range(self):
+        m = mcu.Microcontroller()
+        with pytest.raises(ValueError):
+            m.load_hex_file(':020000040001F9\n:0100000001FE\n:00000001FF\n')
+
+    def test_load_binary(self):
+        m = mcu.Microcontroller()
+        m.load_binary(bytes([2, 0, 3, 4]))
+        assert m.rom[0:4] == bytes([2, 0, 3, 4]) and m.rom[4] == 0 and len(m.rom) == 65536
+        m.next_cycle()
+        assert m.pc == 3
+
+    def test_snapshot(self):
+        m = mcu.Microcontroller()
+        m.rom[0:4] = bytes([4, 240, 163, 128])  # INC A, MOVX @DPTR, A, INC DPTR
+        m.rom[4:6] = bytes([128, 250])  # SJMP 0
+        m.mem.a = 10
+        m.mem.int1 = 0
+        m.xmem[1000] = 5
+        snapshot = m.snapshot()
+        assert len(snapshot) == 14 + 256 + 1 + 32 + 256, 'Unwritten XRAM pages stored'
+        state = (int(m.pc), bytes(m.mem), list(m.xmem), list(m.interrupt_stack), m.mem.int1_previous_state)
+        a = m.mem.a
+        m.run(max_cycles=500)
+        m.interrupt_stack.push(3)
+        m.restore(snapshot)
+        assert (int(m.pc), bytes(m.mem), list(m.xmem), list(m.interrupt_stack), m.mem.int1_previous_state) == state
+        assert m.mem.a is a and a == 10, 'Byte views replaced'
+
+    def test_snapshot__compressed(self):
+        m = mcu.Microcontroller()
+        for addr in range(65536):
+            m.xmem[addr] = addr % 7
+        snapshot = m.snapshot(compress_xram=True)
+        assert len(snapshot) < 2048
+        m.reset_ram()
+        m.mem.int0 = 0
+        m.restore(snapshot)
+        assert list(m.xmem) == [addr % 7 for addr in range(65536)] and m.mem.pending_interrupts == 0
+
+    def test_fork(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 4  # INC A
+        m.mem.a = 10
+        m.mem.int0 = 0
+        m.interrupt_stack.push(5)
+        m.xmem[300] = 7
+        child = m.fork()
+        assert child.rom.image is m.rom.image, 'ROM copied'
+        assert child.snapshot() == m.snapshot()
+        child.next_cycle()
+        child.xmem[300] = 8
+        assert m.mem.a == 10 and m.xmem[300] == 7 and int(m.pc) == 0
+        assert child.mem.a == 11 and child.xmem[300] == 8 and list(child.interrupt_stack) == [0, 5]
+
+    def test_fork__replaced_handlers(self):
+        m = mcu.Microcontroller()
+        calls = []
+        m.register_handler(0, lambda: calls.append(1))
+        m.fork().next_cycle()
+        assert calls == [1]
+
+    def make_time_travel_mc(self, capacity=1000, keyframe_interval=7):
+        m = mcu.Microcontroller()
+        m.rom[0:3] = bytes([4, 240, 163])  # INC A, MOVX @DPTR, A, INC DPTR
+        m.rom[3:5] = bytes([128, 251])  # SJMP 0
+        m.rom[11:13] = bytes([15, 50])  # INC R7, RETI
+        m.mem.tmod = 0b00000010
+        m.mem.th0 = 240
+        m.mem.tl0 = 240
+        m.mem.ie = 0b10000010
+        m.mem.tr0 = 1
+        m.enable_time_travel(capacity, keyframe_interval)
+        return m
+
+    def test_step_back(self):
+        m = self.make_time_travel_mc()
+        snapshots = []
+        for _ in range(100):
+            snapshots.append(m.snapshot())
+            m.next_cycle()
+        assert m.mem.r7 > 0, 'No interrupt serviced'
+        for n in (1, 5, 7, 30, 57):
+            m.step_back(n)
+            assert m.snapshot() == snapshots[-n]
+            del snapshots[-n:]
+            assert len(m.time_travel) == len(snapshots)
+        for _ in range(20):
+            snapshots.append(m.snapshot())
+            m.next_cycle()
+        m.step_back(20)
+        assert m.snapshot() == snapshots[-20]
+        with pytest.raises(ValueError):
+            m.step_back(1)
+
+    def test_step_back__capacity(self):
+        m = self.make_time_travel_mc(capacity=50)
+        m.run(max_cycles=300)
+        assert len(m.time_travel) == 50
+        snapshot = m.snapshot()
+        m.next_cycle()
+        m.step_back()
+        assert m.snapshot() == snapshot
+        m.step_back(49)
+        with pytest.raises(ValueError):
+            m.step_back()
+
+    def test_step_back__xram_page(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 240  # MOVX @DPTR, A
+        m.mem.dptr = 5000
+        m.mem.a = 1
+        snapshot = m.snapshot()
+        m.enable_time_travel()
+        m.next_cycle()
+        m.step_back()
+        assert m.snapshot() == snapshot
+
+    def test_run_back_to(self):
+        m = self.make_time_travel_mc()
+        m.run(max_cycles=100)
+        m.run(until_pc=12)
+        snapshot = m.snapshot()
+        m.run(max_cycles=10)
+        assert m.run_back_to(12) > 0
+        assert m.snapshot() == snapshot
+        with pytest.raises(ValueError):
+            m.run_back_to(1000)
+        with pytest.raises(RuntimeError):
+            mcu.Microcontroller().step_back()
+
+    def test_restore__wrong_version(self):
+        with pytest.raises(ValueError):
+            mcu.Microcontroller().restore(bytes(300))
+
+    def test_restore__truncated(self):
+        m = mcu.Microcontroller()
+        m.xmem[1000] = 5
+        snapshot = m.snapshot()
+        m.mem.a = 3
+        for blob in (snapshot[:-1], snapshot + bytes(1), snapshot[:280], m.snapshot(compress_xram=True)[:-2]):
+            with pytest.raises(ValueError):
+                m.restore(blob)
+        assert m.mem.a == 3 and m.xmem[1000] == 5, 'Restored partially'
+
     def test_reset_rom(self):
         m = mcu.Microcontroller()
         m.rom[100] = 123
@@ -179,6 +333,160 @@ class TestMicrocontroller:
         m.next_cycle()
         assert m.pc == 43981  # 171 * 2 ** 8 + 205
 
+    def test_register_handler(self):
+        m = mcu.Microcontroller()
+        calls = []
+        m.register_handler(4, lambda: calls.append(int(m.pc)))  # INC A
+        m.rom[0] = 4
+        m.next_cycle()
+        assert calls == [1], 'Registered handler not called'
+        assert m.mem.a == 0, 'Original handler still called'
+
+    def test_decode_cache(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 116  # MOV A, #5
+        m.rom[1] = 5
+        m.next_cycle()
+        assert m.mem.a == 5
+        handler, args, length, cycles = m._decoded[0]
+        assert args == (5,) and length == 2 and cycles == 1
+
+        m.rom[1] = 7  # Overwriting an argument invalidates the instruction
+        m.pc = 0
+        m.next_cycle()
+        assert m.mem.a == 7
+
+        m.load_hex_file(':02000000740981\n:00000001FF\n')  # MOV A, #9
+        m.pc = 0
+        m.next_cycle()
+        assert m.mem.a == 9
+
+        m.reset_rom()
+        assert not m._decoded
+        m.next_cycle()
+        assert m.mem.a == 0 and m.pc == 1
+
+    def test_run__max_cycles(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 163  # INC DPTR (2 cycles)
+        m.rom[1] = 163
+        m.rom[2] = 163
+        result = m.run(max_cycles=3)
+        assert result.reason == mcu.StopReason.MAX_CYCLES
+        assert result.cycles == 4 and result.instructions == 2
+        assert m.mem.dptr == 2
+
+    def test_run__cycle_counter(self):
+        counts = []
+        for translate in (False, True):
+            m = mcu.Microcontroller(oscillator_hz=6000000)
+            m.rom[0:5] = bytes([163, 218, 254, 128, 251])  # INC DPTR, DJNZ R2, $, SJMP 0
+            m.mem.ie = 0b10000000
+            result = m.run(max_cycles=5000, translate=translate)
+            assert m.cycles == result.cycles and result.device_seconds == m.seconds == pytest.approx(m.cycles * 2e-6)
+            assert result.seconds > 0 and result.real_time_factor > 0
+            counts.append((m.cycles, bytes(m.mem)))
+        assert counts[0] == counts[1]
+
+    def test_run_for_cycles(self):
+        m = mcu.Microcontroller()
+        m.rom[0:3] = bytes([163, 128, 253])  # INC DPTR, SJMP 0
+        m.mem.ea = 1
+        result = m.run_for_cycles(4)
+        assert result.reason == mcu.StopReason.MAX_CYCLES and m.cycles == 5
+        # Continued from the deadline of the previous call
+        m.run_for_cycles(1)
+        assert m.cycles == 5
+        for _ in range(10):
+            m.run_for_cycles(4)
+        assert m.cycles == 45
+        m.next_cycle()
+        m.run_for_cycles(1)
+        assert m.cycles == 48
+
+    def test_run_for_seconds(self):
+        m = mcu.Microcontroller(oscillator_hz=11059200)
+        m.mem.ea = 1
+        for _ in range(10):
+            m.run_for_seconds(0.05)
+        assert m.cycles == 460800 and m.seconds == pytest.approx(0.5)
+        # 92.16 cycles each, the fractions carried over to the following calls
+        for _ in range(100):
+            m.run_for_seconds(0.0001)
+        assert m.cycles == 460800 + 9216
+
+    def test_run_for_cycles__halt(self):
+        m = mcu.Microcontroller()
+        m.rom[0:2] = bytes([128, 254])  # SJMP $
+        m.mem.tmod = 0b00000001
+        m.mem.tr0 = 1
+        stepped = m.fork()
+        for _ in range(70000):
+            stepped.next_cycle()
+        result = m.run_for_cycles(70000)
+        assert result.reason == mcu.StopReason.MAX_CYCLES and result.instructions == 70000
+        assert m.snapshot() == stepped.snapshot() and m.mem.tf0 == 1
+        assert m.run().reason == mcu.StopReason.HALT
+
+    def test_run_for_cycles__halt_with_time_travel(self):
+        m = mcu.Microcontroller()
+        m.rom[0:2] = bytes([128, 254])  # SJMP $
+        m.enable_time_travel()
+        m.run_for_cycles(100)
+        assert len(m.time_travel) == 100
+        m.step_back()
+        assert m.cycles == 99
+
+    def test_cycle_counter__snapshot_and_fork(self):
+        m = mcu.Microcontroller()
+        m.run(max_cycles=10)
+        snapshot = m.snapshot()
+        assert m.fork().cycles == 10
+        m.run(max_cycles=10)
+        m.restore(snapshot)
+        assert m.cycles == 10
+        m.reset_ram()
+        assert m.cycles == 0
+
+    def test_run__until_pc_and_breakpoints(self):
+        m = mcu.Microcontroller()
+        result = m.run(until_pc=5)
+        assert result.reason == mcu.StopReason.UNTIL_PC
+        assert m.pc == 5 and result.cycles == 5
+        result = m.run(breakpoints=[3, 9])
+        assert result.reason == mcu.StopReason.BREAKPOINT
+        assert m.pc == 9 and result.instructions == 4
+
+    def test_run__halt(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 4  # INC A
+        m.rom[1] = 128  # SJMP $
+        m.rom[2] = 254
+        result = m.run()
+        assert result.reason == mcu.StopReason.HALT
+        assert m.pc == 1 and m.mem.a == 1 and result.instructions == 1
+
+        m.rom[1] = 1  # AJMP 1h
+        m.rom[2] = 1
+        assert m.run().reason == mcu.StopReason.HALT
+
+        m.rom[1] = 2  # LJMP 1h
+        m.rom[2] = 0
+        m.rom[3] = 1
+        assert m.run().reason == mcu.StopReason.HALT
+
+        # An interrupt can still leave the loop
+        m.mem.ea = 1
+        assert m.run(max_cycles=10).reason == mcu.StopReason.MAX_CYCLES
+
+    def test_run__halt_with_replaced_handler(self):
+        m = mcu.Microcontroller()
+        m.rom[0:2] = bytes([128, 254])  # SJMP $
+        calls = []
+        m.register_handler(128, lambda offset: (calls.append(offset), m._exec_128(offset)))
+        result = m.run(max_cycles=100, translate=False)
+        assert result.reason == mcu.StopReason.MAX_CYCLES and len(calls) == 100
+
     def test_pc_prop(self):
         m = mcu.Microcontroller()
         m.pc = 65538
@@ -726,8 +1034,14 @@ class TestMicrocontroller:
 
     def test_exec_144(self):
         m = mcu.Microcontroller()
-        m._exec_144(30)
-        assert m.mem.dptr == 30
+        m._exec_144(1, 30)
+        assert m.mem.dptr == 286
+
+    def test_exec_144__decoded(self):
+        m = mcu.Microcontroller()
+        m.rom[0:3] = bytes([144, 18, 52])  # MOV DPTR, #1234h
+        m.next_cycle()
+        assert m.mem.dptr == 0x1234 and m.pc == 3
 
     def test_exec_146(self):
         m = mcu.Microcontroller()
@@ -747,6 +1061,16 @@ class TestMicrocontroller:
         assert m.mem.ac == 0
         assert m.mem.ov == 1
 
+    def test_exec_148__borrow(self):
+        m = mcu.Microcontroller()
+        m.mem.a = 0
+        m.mem.c = 1
+        m._exec_148(0)
+        assert m.mem.a == 255
+        assert m.mem.c == 1, 'Borrow not included in C'
+        assert m.mem.ac == 1, 'Borrow not included in AC'
+        assert m.mem.ov == 0
+
     def test_exec_149(self):
         m = mcu.Microcontroller()
         m.mem.a = 201
@@ -997,6 +1321,13 @@ class TestMicrocontroller:
         m._exec_212()
         assert m.mem.a == 36 and m.mem.c == 1
 
+    def test_exec_212__auxiliary_carry(self):
+        m = mcu.Microcontroller()
+        m.mem.a = 0x38 + 0x29  # 0x61 after ADD, with AC set
+        m.mem.ac = 1
+        m._exec_212()
+        assert m.mem.a == 0x67 and m.mem.c == 0
+
     def test_exec_213(self):
         m = mcu.Microcontroller()
         m.mem[20] = 2
@@ -1104,6 +1435,137 @@ class TestMicrocontroller:
         assert m.mem.r2 == 50
 
 
+class TestBlockTranslator:
+    # LJMP 30h; T0 ISR at Bh: INC R7, RETI
+    # 30h: MOV A, R0; ADD A, #3; MOV R0, A; MOVX @R1, A; INC R1; DJNZ R2, 30h; CPL TF0; SJMP 30h
+    program = {0: [2, 0, 48], 11: [15, 50],
+               48: [232, 36, 3, 248, 243, 9, 218, 248, 178, 141, 128, 242]}
+
+    def make_microcontroller(self, interrupts):
+        m = mcu.Microcontroller()
+        for addr, code in self.program.items():
+            for offset, byte in enumerate(code):
+                m.rom[addr + offset] = byte
+        m.mem.t0_m0 = 1
+        m.mem.tl0 = 200
+        m.mem.th0 = 255
+        m.mem.tr0 = 1
+        if interrupts:
+            m.mem.ea = 1
+            m.mem.et0 = 1
+        return m
+
+    def state(self, m):
+        return ([int(m.mem[addr]) for addr in range(256)], [int(m.xmem[addr]) for addr in range(256)],
+                int(m.pc), m.interrupt_stack._data)
+
+    def test_translate(self):
+        m = self.make_microcontroller(interrupts=False)
+        m.pc = 48
+        block = m.translator._translate(48)
+        assert block.addrs == [48, 49, 51, 52, 53, 54]
+        assert block.cycles == 8
+        assert m.translator._translate(56) is None, 'CPL on a TCON bit must be stepped'
+
+    def test_next_block__same_state_as_stepping(self):
+        for interrupts in (False, True):
+            stepped = self.make_microcontroller(interrupts)
+            translated = self.make_microcontroller(interrupts)
+            result1 = stepped.run(max_cycles=3000, translate=False)
+            result2 = translated.run(max_cycles=3000)
+            assert (result1.cycles, result1.instructions) == (result2.cycles, result2.instructions)
+            assert self.state(stepped) == self.state(translated)
+
+    def test_next_block__stops_inside_a_block(self):
+        m = self.make_microcontroller(interrupts=False)
+        result = m.run(breakpoints=[52], max_cycles=100)
+        assert result.reason == mcu.StopReason.BREAKPOINT and m.pc == 52
+        result = m.run(max_cycles=3)
+        assert result.cycles == 3 and m.pc == 54
+
+    def test_fast_forward__same_state_as_stepping(self):
+        programs = [
+            # MOV R2, #200; DJNZ R2, $; JNB TF0, $; CLR TF0; SJMP 0h
+            [122, 200, 218, 254, 48, 141, 253, 194, 141, 128, 244],
+            # DJNZ 30h, $; SJMP $ with T0 ISR at Bh: INC R7, RETI
+            {0: [213, 48, 253, 128, 254], 11: [15, 50]},
+        ]
+        for program in programs:
+            machines = []
+            for _ in range(2):
+                m = mcu.Microcontroller()
+                for addr, code in (program.items() if isinstance(program, dict) else [(0, program)]):
+                    for offset, byte in enumerate(code):
+                        m.rom[addr + offset] = byte
+                m.mem.t0_m0 = 1
+                m.mem.tr0 = 1
+                m.mem.tl0 = 17
+                m.mem.th0 = 240
+                m.mem.tr1 = 1
+                m.mem.t1_m1 = 1
+                m.mem.ea = 1
+                m.mem.et0 = 1
+                machines.append(m)
+            stepped, forwarded = machines
+            result1 = stepped.run(max_cycles=6001, translate=False)
+            result2 = forwarded.run(max_cycles=6001)
+            assert (result1.cycles, result1.instructions) == (result2.cycles, result2.instructions)
+            assert self.state(stepped) == self.state(forwarded)
+
+    def test_fast_forward__djnz(self):
+        m = mcu.Microcontroller()
+        m.rom[0] = 218  # DJNZ R2, $
+        m.rom[1] = 254
+        m.mem.r2 = 100
+        assert m.translator.next_block() == (198, 99)
+        assert m.mem.r2 == 1 and m.pc == 0
+        assert m.translator.next_block() == (2, 1)
+        assert m.mem.r2 == 0 and m.pc == 2
+
+    def test_next_block__exception(self):
+        machines = []
+        for translate in (False, True):
+            m = self.make_microcontroller(interrupts=False)
+            m.rom[48:52] = bytes([4, 163, 132, 4])  # INC A, INC DPTR, DIV AB, INC A
+            with pytest.raises(ZeroDivisionError):
+                m.run(translate=translate)
+            machines.append(m)
+        stepped, translated = machines
+        assert self.state(stepped) == self.state(translated) and stepped.pc == 50
+        assert stepped.cycles == translated.cycles
+
+    def test_invalidate(self):
+        m = self.make_microcontroller(interrupts=False)
+        m.run(max_cycles=20)
+        assert m.translator._blocks
+        m.rom[50] = 4
+        assert not m.translator._blocks
+
+
+class TestRom:
+    def test_digest(self):
+        m = mcu.Microcontroller()
+        digest = m.rom.digest
+        assert digest == mcu.Microcontroller().rom.digest and m.rom.digest is digest
+        m.rom[5] = 4
+        assert m.rom.digest != digest and bytes(m.rom)[5] == 4
+        m.rom[5] = 0
+        assert m.rom.digest == digest
+
+    def test_image(self):
+        m1 = mcu.Microcontroller()
+        m1.rom[5] = 4
+        m2 = mcu.Microcontroller()
+        m2.load_binary(m1.rom.image)
+        assert m2.rom.image is m1.rom.image, 'Image copied'
+        m2.rom[5] = 20
+        assert m1.rom[5] == 4 and m2.rom[5] == 20, 'Image not copied on write'
+
+    def test_image_too_large(self):
+        with pytest.raises(ValueError):
+            mcu.Rom(mcu.Microcontroller(), bytes(65537))
+
+
 class TestInternalDataMemory:
     def test_access(self):
         mem = mcu.InternalDataMemory()
@@ -1119,6 +1581,64 @@ class TestInternalDataMemory:
         mem[5][1] = 1
         assert mem[5] == 64, 'Bit access not supported'
 
+    def test_flags(self):
+        mem = mcu.InternalDataMemory()
+        mem.tr0 = 1
+        mem.p3 = 0
+        flags = mem.flags('tcon', 'psw')
+        assert len(flags) == 16 and flags['tr0'] == 1 and flags['c'] == 0
+        assert len(mem.flags()) == len(mcu.SFR_BITS) and mem.flags()['int0'] == 0
+
+    def test_update_parity(self):
+        mem = mcu.InternalDataMemory()
+        mem.a = 0b110
+        assert mem.parity_stale
+        mem.update_parity()
+        assert mem.p == 1 and not mem.parity_stale
+        mem[208] = 0
+        assert mem.parity_stale, 'P not recomputed after a PSW write'
+
+    def test_read_bit(self):
+        mem = mcu.InternalDataMemory()
+        mem[33] = 0b00000100
+        mem[208] = 0b10000000
+        assert mem.read_bit(10) == 1 and mem.read_bit(9) == 0
+        assert mem.read_bit(215) == 1, 'SFR bit not supported'
+
+    def test_write_bit(self):
+        mem = mcu.InternalDataMemory()
+        mem.write_bit(10, 1)
+        mem.write_bit(140, 1)
+        assert mem[33] == 0b00000100 and mem.tr0 == 1
+        mem.write_bit(10, 0)
+        assert mem[33] == 0
+
+    def test__bytes__(self):
+        mem = mcu.InternalDataMemory()
+        mem[2] = 30
+        snapshot = bytes(mem)
+        mem[2] = 31
+        assert len(snapshot) == 256 and snapshot[2] == 30 and snapshot[129] == 7
+
+    def test_pending_interrupts(self):
+        mem = mcu.InternalDataMemory()
+        assert mem.pending_interrupts == 0
+        mem.tf0 = 1
+        assert mem.pending_interrupts == 0, 'Request not enabled'
+        mem.et0 = 1
+        assert mem.pending_interrupts == 0, 'Interrupts not enabled globally'
+        mem.ea = 1
+        assert mem.pending_interrupts == 0b10
+        mem[136] = 0b10101000
+        assert mem.pending_interrupts == 0b10, 'TF1/IE1 requests not enabled'
+        mem.ie = 0b10001111
+        assert mem.pending_interrupts == 0b1110
+        mem.tcon = 0
+        mem.int1 = 0
+        assert mem.pending_interrupts == 0b100000, 'INT1 pin low not reported'
+        mem.int0 = 0
+        assert mem.pending_interrupts == 0b110000, 'INT0 pin low not reported'
+
     def test_p0_prop(self):
         mem = mcu.InternalDataMemory()
         assert mem.p0 == 0b11111111
@@ -1134,6 +1654,9 @@ class TestInternalDataMemory:
         assert mem.dptr == 4, 'Overflow not supported - int?'
         mem.dptr = 65530
         assert mem[130] == int('1' * 8, 2) and mem[131] == int('11111010', 2), 'Wrong binary representation'
+        mem[130] = 1
+        mem[131] = 2
+        assert mem.dptr == 258 and mem.read_dptr() == 258, 'DPH/DPL writes not reflected'
 
     def test_tcon_prop(self):
         mem = mcu.InternalDataMemory()
@@ -1274,6 +1797,15 @@ class TestInternalDataMemory:
         assert mem.p == 1
         assert mem[208][7] == 1
 
+    def test_bank_base(self):
+        mem = mcu.InternalDataMemory()
+        mem.rs0 = 1
+        assert mem.bank_base == 8
+        mem[208] = 0b00010000
+        assert mem.bank_base == 16
+        mem.psw[4] = 1
+        assert mem.bank_base == 24 and id(mem.r7) == id(mem[31])
+
     def test_selected_register_bank_prop(self):
         mem = mcu.InternalDataMemory()
         mem.selected_register_bank = 3
@@ -1289,13 +1821,41 @@ class TestInternalDataMemory:
 class TestExternalDataMemory:
     def test_access(self):
         xmem = mcu.ExternalDataMemory()
-        byte_id = id(xmem[2])
         xmem[2] = mcu.Byte(30)
-        assert xmem[2] == 30 and id(xmem[2]) == byte_id, 'Decimal access not supported'
+        assert xmem[2] == 30, 'Decimal access not supported'
+        assert xmem[65328] is xmem.csds, 'Device register view not kept'
         b = mcu.DoubleByte(500)
         xmem[b] = mcu.Byte(30)
         assert xmem[500] == 30, 'Cannot use a DoubleByte instance as an address - not converted to int?'
 
+    def test__iter__(self):
+        xmem = mcu.ExternalDataMemory()
+        xmem[300] = 5
+        values = list(xmem)
+        assert len(values) == 65536 and values[300] == 5 and sum(values) == 5
+
+    def test_read(self):
+        xmem = mcu.ExternalDataMemory()
+        assert xmem.read(65535) == 0
+        xmem[65535] = 260
+        assert xmem.read(65535) == 4 and xmem[65535] == 4
+
+    def test_views_not_kept(self):
+        xmem = mcu.ExternalDataMemory()
+        for addr in range(65536):
+            xmem[addr] += 1
+        assert len(xmem._views) == 4
+
+    def test_fork(self):
+        xmem = mcu.ExternalDataMemory()
+        xmem[300] = 7
+        xmem[600] = 1
+        fork = xmem.fork()
+        assert fork._pages[1] is xmem._pages[1], 'Page copied'
+        xmem[301] = 2
+        fork[600] = 3
+        assert fork[301] == 0 and fork[300] == 7 and xmem[600] == 1 and fork._pages[1] is not xmem._pages[1]
+
     def test_csds_prop(self):
         xmem = mcu.ExternalDataMemory()
         xmem.csds = 20
@@ -1305,6 +1865,7 @@ class TestExternalDataMemory:
 class TestByte:
     def test__getitem__(self):
         assert mcu.Byte(4)[5] == 1, 'Bit access not supported'
+        assert mcu.Byte(1)[-1] == 1 and mcu.Byte(1)[0] == 0, 'Negative bit number not supported'
 
     def test__setitem__(self):
         b = mcu.Byte()
@@ -1373,6 +1934,22 @@ class TestByte:
         assert b == 128
 
 
+class TestByteView:
+    def test_value(self):
+        mem = mcu.InternalDataMemory()
+        view = mcu.ByteView(mem, 5)
+        mem[5] = 7
+        assert view == 7, 'Value not read from the memory'
+        view.value = 300
+        view[0] = 1
+        assert mem[5] == 172, 'Value not written to the memory'
+
+    def test_arithmetic(self):
+        mem = mcu.InternalDataMemory()
+        result = mcu.ByteView(mem, 5) + 3
+        assert type(result) is mcu.Byte and result == 3 and mem[5] == 0, 'Result tied to the memory'
+
+
 class TestDoubleByte:
     def test__getitem__(self):
         assert mcu.DoubleByte(2048)[4] == 1, 'Bit access not supported'
@@ -1386,6 +1963,11 @@ class TestDoubleByte:
         assert mcu.DoubleByte(65538) == 2, 'Overflow not supported'
         assert mcu.DoubleByte(-4) == 65532, 'Underflow not supported'
 
+    def test_rotate_left(self):
+        b = mcu.DoubleByte(32768)
+        b.rotate_left()
+        assert b == 1
+
 
 class TestTimer0:
     def test_increment__mode3_th0_only(self):
@@ -1461,6 +2043,50 @@ class TestTimer0:
         assert m.mem.tl0 == 2
         assert m.mem.tf0 == 1
 
+    def test_advance(self):
+        for mode in range(4):
+            for th0, tl0, n in [(255, 25, 10), (0, 200, 100), (7, 31, 9000), (200, 254, 20000), (255, 255, 1)]:
+                m1 = mcu.Microcontroller()
+                m2 = mcu.Microcontroller()
+                for m in (m1, m2):
+                    m.mem.t0_m1, m.mem.t0_m0 = divmod(mode, 2)
+                    m.mem.th0 = th0
+                    m.mem.tl0 = tl0
+                for _ in range(n):
+                    m1.timer0.increment()
+                m2.timer0.advance(n)
+                assert (m2.mem.th0, m2.mem.tl0, m2.mem.tf0) == (m1.mem.th0, m1.mem.tl0, m1.mem.tf0)
+
+    def test_advance__overflows(self):
+        m = mcu.Microcontroller()
+        m.mem.t0_m1 = 1
+        m.mem.th0 = 156
+        m.mem.tl0 = 250
+        assert m.timer0.advance(1006) == 11
+        assert m.mem.tl0 == 156 and m.mem.tf0 == 1
+
+    def test_advance__mode3_th0_only(self):
+        m = mcu.Microcontroller()
+        m.mem.th0 = 250
+        assert m.timer0.advance(300, mode3_th0_only=True) == 2
+        assert m.mem.th0 == 38 and m.mem.tf1 == 1 and m.mem.tf0 == 0
+
+
+class TestTimer1:
+    def test_advance(self):
+        for mode in range(4):
+            for th1, tl1, n in [(255, 25, 10), (0, 200, 100), (7, 31, 9000), (200, 254, 20000)]:
+                m1 = mcu.Microcontroller()
+                m2 = mcu.Microcontroller()
+                for m in (m1, m2):
+                    m.mem.t1_m1, m.mem.t1_m0 = divmod(mode, 2)
+                    m.mem.th1 = th1
+                    m.mem.tl1 = tl1
+                for _ in range(n):
+                    m1.timer1.increment()
+                m2.timer1.advance(n)
+                assert (m2.mem.th1, m2.mem.tl1, m2.mem.tf1) == (m1.mem.th1, m1.mem.tl1, m1.mem.tf1)
+
 
 class TestOperation:
     def test_cycles(self):
@@ -1482,6 +2108,26 @@ class TestOperation:
         assert op.args == (171, 205), 'Wrong args - merged?'
         assert str(op) == 'LCALL ABCDh', 'Wrong representation - miscalculated value?'
 
+    def test_mnemonic(self):
+        mnemonic = mcu.Operation.mnemonic(18, (171, 205))
+        assert mnemonic == 'LCALL ABCDh'
+        assert mcu.Operation.mnemonic(18, [171, 205]) is mnemonic, 'Mnemonic not cached'
+
+
+class TestOpcodeInfo:
+    def test_attributes(self):
+        info = mcu.OPCODES[213]
+        assert info.length == 3 and info.cycles == 2 and info.name == 'DJNZ'
+        assert info.operand_kinds == ('direct', 'offset') and info.handler is mcu.Microcontroller._exec_213
+
+    def test_immutable(self):
+        with pytest.raises(AttributeError):
+            mcu.OPCODES[0].length = 2
+
+    def test_operand_kinds(self):
+        for info in mcu.OPCODES:
+            assert len(info.operand_kinds) == info.handler.__code__.co_argcount - 1, info
+
 
 class TestStack:
     def test_stack(self):